@@ -26,5 +26,6 @@ setup(
     include_package_data=True,
     zip_safe=False,
     package_dir={'': 'src'},
-    install_requires=['protobuf==5.29.6', 'grpcio']
+    install_requires=['protobuf==5.29.6', 'grpcio'],
+    extras_require={'health': ['grpcio-health-checking']}
 )
@@ -24,6 +24,21 @@ class NlpServiceStub(object):
         request_serializer=annotation__pb2.Void.SerializeToString,
         response_deserializer=annotation__pb2.RegisteredPipelinesReply.FromString,
         )
+    self.process_stream = channel.stream_stream(
+        '/NlpService/process_stream',
+        request_serializer=annotation__pb2.ProcessRequest.SerializeToString,
+        response_deserializer=annotation__pb2.ProcessReply.FromString,
+        )
+    self.process_batch = channel.unary_unary(
+        '/NlpService/process_batch',
+        request_serializer=annotation__pb2.ProcessBatchRequest.SerializeToString,
+        response_deserializer=annotation__pb2.ProcessBatchReply.FromString,
+        )
+    self.get_stats = channel.unary_unary(
+        '/NlpService/get_stats',
+        request_serializer=annotation__pb2.Void.SerializeToString,
+        response_deserializer=annotation__pb2.StatsReply.FromString,
+        )
 
 
 class NlpServiceServicer(object):
@@ -44,6 +59,27 @@ class NlpServiceServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def process_stream(self, request_iterator, context):
+    """Process a stream of documents. Replies are tagged with ids of requests.
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def process_batch(self, request, context):
+    """Process a batch of documents with one pipeline.
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def get_stats(self, request, context):
+    """Get metrics of the service.
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
 
 def add_NlpServiceServicer_to_server(servicer, server):
   rpc_method_handlers = {
@@ -57,6 +93,21 @@ def add_NlpServiceServicer_to_server(servicer, server):
           request_deserializer=annotation__pb2.Void.FromString,
           response_serializer=annotation__pb2.RegisteredPipelinesReply.SerializeToString,
       ),
+      'process_stream': grpc.stream_stream_rpc_method_handler(
+          servicer.process_stream,
+          request_deserializer=annotation__pb2.ProcessRequest.FromString,
+          response_serializer=annotation__pb2.ProcessReply.SerializeToString,
+      ),
+      'process_batch': grpc.unary_unary_rpc_method_handler(
+          servicer.process_batch,
+          request_deserializer=annotation__pb2.ProcessBatchRequest.FromString,
+          response_serializer=annotation__pb2.ProcessBatchReply.SerializeToString,
+      ),
+      'get_stats': grpc.unary_unary_rpc_method_handler(
+          servicer.get_stats,
+          request_deserializer=annotation__pb2.Void.FromString,
+          response_serializer=annotation__pb2.StatsReply.SerializeToString,
+      ),
   }
   generic_handler = grpc.method_handlers_generic_handler(
       'NlpService', rpc_method_handlers)
@@ -0,0 +1,62 @@
+"""Transport options of gRPC channels and servers: compression, message size limits, keepalive."""
+
+import grpc
+
+
+_COMPRESSION = {
+    None : grpc.Compression.NoCompression,
+    'none' : grpc.Compression.NoCompression,
+    'gzip' : grpc.Compression.Gzip,
+    'deflate' : grpc.Compression.Deflate
+}
+
+
+def compression_algorithm(compression):
+    """Converts the name of the compression algorithm (None, 'gzip', or 'deflate') to grpc.Compression."""
+
+    if isinstance(compression, grpc.Compression):
+        return compression
+
+    if compression not in _COMPRESSION:
+        raise ValueError('Unknown compression algorithm: {}'.format(compression))
+
+    return _COMPRESSION[compression]
+
+
+def make_options(max_send_message_length = None, max_receive_message_length = None,
+                 keepalive_time = None, keepalive_timeout = None, min_ping_interval = None, options = None):
+    """Makes a list of options for grpc channels and servers.
+
+    Args:
+        max_send_message_length(int): maximal size of sent messages in bytes (-1 for no limit).
+        max_receive_message_length(int): maximal size of received messages in bytes (-1 for no limit,
+            the gRPC default is 4 MB).
+        keepalive_time(float): interval in seconds between keepalive pings, pings are sent
+            also when there are no active calls.
+        keepalive_timeout(float): time in seconds to wait for the ping acknowledgement before
+            closing the connection.
+        min_ping_interval(float): (servers) minimal allowed interval in seconds between keepalive pings of
+            clients. Should not exceed keepalive_time of clients, otherwise the server closes their connections.
+        options(list): additional raw options [(<name>, <value>), ...], they override the options above.
+
+    Returns:
+        List of options, each option name occurs once.
+    """
+
+    result = {}
+    if max_send_message_length is not None:
+        result['grpc.max_send_message_length'] = max_send_message_length
+    if max_receive_message_length is not None:
+        result['grpc.max_receive_message_length'] = max_receive_message_length
+    if keepalive_time is not None:
+        result['grpc.keepalive_time_ms'] = int(keepalive_time * 1000)
+        result['grpc.keepalive_permit_without_calls'] = 1
+        result['grpc.http2.max_pings_without_data'] = 0
+    if keepalive_timeout is not None:
+        result['grpc.keepalive_timeout_ms'] = int(keepalive_timeout * 1000)
+    if min_ping_interval is not None:
+        result['grpc.http2.min_ping_interval_without_data_ms'] = int(min_ping_interval * 1000)
+        result['grpc.keepalive_permit_without_calls'] = 1
+
+    result.update(options or [])
+    return list(result.items())
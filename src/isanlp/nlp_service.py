@@ -1,10 +1,23 @@
+import asyncio
+import collections
+import functools
+import gc
 import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent import futures
 
 from . import annotation_pb2 as pb
 from . import annotation_pb2_grpc
 from . import annotation_to_protobuf
 from . import annotation_from_protobuf
-from .pipeline_common import PipelineCommon
+from . import nlp_service_metrics
+from .pipeline_common import PipelineCommon, call_batch
+from .processor_spec import build_processor
+from .request_context import (PRIORITY_METADATA_KEY, PRIORITY_INTERACTIVE, PRIORITY_BULK,
+                              deadline_scope, time_remaining)
 
 import grpc
 
@@ -18,11 +31,11 @@ def _expand_ppl(ppl):
 
 
 PPLS = None
-def _init_process(ppls):
+def _init_process(ppls, warmup=None, n_ready=None):
     global PPLS
-    PPLS = ppls
+    PPLS = {name : build_processor(ppl) for name, ppl in ppls.items()}
     standalone_procs = {}
-    for ppl in ppls.values():
+    for ppl in PPLS.values():
         if not isinstance(ppl, PipelineCommon):
             continue
         for proc in ppl.processors_iter():
@@ -31,58 +44,744 @@ def _init_process(ppls):
         standalone_procs.update(_expand_ppl(ppl))
     PPLS.update(standalone_procs)
 
+    if warmup:
+        _warmup(warmup)
+
+    if n_ready is not None:
+        _mark_ready(n_ready)
+
+
+def _mark_ready(n_ready):
+    with n_ready.get_lock():
+        n_ready.value += 1
+
+
+def _warmup(documents):
+    for ppl_name, inputs in documents.items():
+        start = time.perf_counter()
+        try:
+            PPLS[ppl_name](*(inputs if type(inputs) is tuple else (inputs,)))
+        except Exception:
+            logger.exception('Warmup of "{}" failed.'.format(ppl_name))
+            continue
+
+        logger.info('Warmup of "{}" completed in {:.2f} s.'.format(ppl_name, time.perf_counter() - start))
+
     
 def _process_input(ppl_name, input_annotations):
     ppl = PPLS[ppl_name]
-    print(ppl_name, ppl)
     return ppl(*input_annotations)
 
 
+def _process_batch_input(ppl_name, batch):
+    return call_batch(PPLS[ppl_name], batch)
+
+
+def _reply_message(res, request_id=''):
+    reply = pb.ProcessReply(request_id=request_id)
+    reply.output_annotations.Pack(annotation_to_protobuf.convert_annotation(res))
+    return reply
+
+
+def _batch_reply_message(res):
+    reply = pb.ProcessBatchReply()
+    for res_doc in res:
+        reply.output_annotations.add().Pack(annotation_to_protobuf.convert_annotation(res_doc))
+    return reply
+
+
+def _with_request_id(reply, request_id):
+    # the parser merges concatenated messages, so the id can be appended to the serialized reply
+    if not request_id:
+        return reply
+
+    return reply + pb.ProcessReply(request_id=request_id).SerializeToString()
+
+
+class _CachedReply:
+    """Serialized reply found in the reply cache."""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+
+# Functions below process serialized requests in workers (convert_in_workers mode).
+# They return serialized replies (without request ids) and the time spent for conversions.
+
+def _process_request_bytes(ppl_name, data):
+    return _process_requests_bytes(ppl_name, [data])[0]
+
+
+def _process_requests_bytes(ppl_name, batch):
+    start = time.perf_counter()
+    requests = [pb.ProcessRequest.FromString(data) for data in batch]
+    inputs = [annotation_from_protobuf.convert_annotation(request.input_annotations) for request in requests]
+    conversion_time = time.perf_counter() - start
+
+    res = call_batch(PPLS[ppl_name], inputs) if len(inputs) > 1 else [PPLS[ppl_name](*inputs[0])]
+
+    start = time.perf_counter()
+    replies = [_reply_message(res_doc).SerializeToString() for res_doc in res]
+    conversion_time = (conversion_time + time.perf_counter() - start) / len(batch)
+    return [(reply, conversion_time) for reply in replies]
+
+
+def _process_batch_request_bytes(ppl_name, data):
+    start = time.perf_counter()
+    request = pb.ProcessBatchRequest.FromString(data)
+    batch = [annotation_from_protobuf.convert_annotation(e) for e in request.input_annotations]
+    conversion_time = time.perf_counter() - start
+
+    res = call_batch(PPLS[ppl_name], batch)
+
+    start = time.perf_counter()
+    reply = _batch_reply_message(res).SerializeToString()
+    return reply, conversion_time + time.perf_counter() - start
+
+
+class DeadlineExceededError(Exception):
+    """Request is skipped since its deadline expired before processing."""
+    pass
+
+
+def _run_timed(deadline, func, *args):
+    # requests can wait in the queue of the pool longer than their deadline
+    if deadline is not None and time.time() >= deadline:
+        raise DeadlineExceededError('The deadline expired before processing.')
+
+    with deadline_scope(deadline):
+        started = time.time()
+        start = time.perf_counter()
+        res = func(*args)
+        return started, time.perf_counter() - start, res
+
+
+def _set_result(future, result):
+    # the future can be cancelled by the caller (e.g., when the client cancels the call)
+    try:
+        future.set_result(result)
+    except futures.InvalidStateError:
+        pass
+
+
+def _set_exception(future, err):
+    try:
+        future.set_exception(err)
+    except futures.InvalidStateError:
+        pass
+
+
+_PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+
+class QueueFullError(Exception):
+    """Request is rejected since the queue of the pipeline is full."""
+    pass
+
+
+class _PipelineQueue:
+    """Limits the number of simultaneously processed requests to a pipeline.
+
+    Requests above the limit wait in queues (lanes) of their priorities and are started when running
+    requests complete, so they do not occupy workers of the pool. Interactive requests are started
+    before bulk ones. If the lane is full, the request is rejected with QueueFullError.
+
+    Args:
+        limit(int): maximal number of simultaneously processed requests.
+        max_queue_size(int): maximal number of waiting requests in each lane (not limited if None).
+    """
+
+    def __init__(self, limit, max_queue_size=None):
+        self._limit = limit
+        self._max_queue_size = max_queue_size
+        self._running = 0
+        self._lanes = {priority : collections.deque() for priority in _PRIORITIES}
+        self._lock = threading.Lock()
+
+    def submit(self, start, priority=PRIORITY_INTERACTIVE):
+        """Starts the request (start is a function that returns concurrent.futures.Future) within the limit."""
+
+        future = futures.Future()
+        with self._lock:
+            if self._running < self._limit:
+                self._running += 1
+            else:
+                lane = self._lanes[priority]
+                if self._max_queue_size is not None and len(lane) >= self._max_queue_size:
+                    future.set_exception(QueueFullError('The {} queue is full ({} requests).'
+                                                        .format(priority, len(lane))))
+                else:
+                    lane.append((start, future))
+
+                return future
+
+        self._start(start, future)
+        return future
+
+    def queue_size(self):
+        with self._lock:
+            return sum(len(lane) for lane in self._lanes.values())
+
+    def _start(self, start, future):
+        try:
+            inner = start()
+        except Exception as err:
+            inner = futures.Future()
+            inner.set_exception(err)
+
+        inner.add_done_callback(lambda f: self._finish(f, future))
+
+    def _finish(self, inner, future):
+        if inner.cancelled():
+            future.cancel()
+        elif inner.exception() is not None:
+            _set_exception(future, inner.exception())
+        else:
+            _set_result(future, inner.result())
+
+        with self._lock:
+            next_request = None
+            for priority in _PRIORITIES:
+                lane = self._lanes[priority]
+                # requests cancelled while waiting are skipped
+                while lane and lane[0][1].cancelled():
+                    lane.popleft()
+
+                if lane:
+                    next_request = lane.popleft()
+                    break
+
+            if next_request is None:
+                self._running -= 1
+                return
+
+        self._start(*next_request)
+
+
+class _MicroBatcher:
+    """Coalesces documents submitted at about the same time into batches.
+
+    A batch is closed when it contains max_size documents or when its first document has waited
+    for max_wait seconds. Results of the batch are distributed to futures of the documents.
+
+    Args:
+        run: function that takes a list of documents, priority and deadline (keyword arguments) and returns
+            concurrent.futures.Future with a list of results.
+        max_size(int): maximal number of documents in a batch.
+        max_wait(float): maximal waiting time in seconds.
+    """
+
+    def __init__(self, run, max_size, max_wait):
+        self._run = run
+        self._max_size = max_size
+        self._max_wait = max_wait
+        self._pending = []
+        self._deadline = None
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, document, priority=PRIORITY_INTERACTIVE, deadline=None):
+        future = futures.Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, daemon=True)
+                self._thread.start()
+
+            self._pending.append((document, future, priority, deadline))
+            if len(self._pending) == 1:
+                self._deadline = time.monotonic() + self._max_wait
+                self._cond.notify()
+            elif len(self._pending) >= self._max_size:
+                self._cond.notify()
+
+        return future
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                while len(self._pending) < self._max_size:
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending[:self._max_size]
+                self._pending = self._pending[self._max_size:]
+                if self._pending:
+                    self._deadline = time.monotonic() + self._max_wait
+
+            # documents cancelled while waiting are not processed
+            batch = [e for e in batch if e[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            # the batch is interactive if it contains at least one interactive document,
+            # it expires with the last deadline of its documents
+            priority = min((priority for _, _, priority, _ in batch), key=_PRIORITIES.index)
+            deadlines = [deadline for _, _, _, deadline in batch]
+            deadline = None if None in deadlines else max(deadlines)
+            try:
+                result = self._run([document for document, _, _, _ in batch], priority=priority, deadline=deadline)
+            except Exception as err:
+                result = futures.Future()
+                result.set_exception(err)
+
+            result.add_done_callback(functools.partial(self._distribute, [future for _, future, _, _ in batch]))
+
+    def _distribute(self, batch_futures, result):
+        if result.cancelled():
+            for future in batch_futures:
+                _set_exception(future, futures.CancelledError())
+        elif result.exception() is not None:
+            for future in batch_futures:
+                _set_exception(future, result.exception())
+        else:
+            for future, res in zip(batch_futures, result.result()):
+                _set_result(future, res)
+
+
+def _priority(context):
+    for key, value in context.invocation_metadata():
+        if key == PRIORITY_METADATA_KEY and value in _PRIORITIES:
+            return value
+
+    return PRIORITY_INTERACTIVE
+
+
+def _deadline(context):
+    remaining = context.time_remaining()
+    # the sync server reports a huge remaining time for calls without deadline
+    if remaining is None or remaining > 1e9:
+        return None
+
+    return time.time() + remaining
+
+
+def _cancel_on_termination(context, future):
+    # the request is dropped if the call terminates while the request waits in a queue
+    if not context.add_callback(future.cancel):
+        future.cancel()
+
+
+def _failed_future(err):
+    future = futures.Future()
+    future.set_exception(err)
+    return future
+
+
 class NlpService(annotation_pb2_grpc.NlpServiceServicer):
     """Basic NLP gRPC annotation service.
 
     Args:
-        ppls: dictionary {<pipeline name> : <pipeline object>}
+        ppls: dictionary {<pipeline name> : <pipeline object>}. A pipeline can be declared by ProcessorSpec,
+            then each worker builds it locally instead of receiving a copy from the serving process.
+        max_workers(int): number of worker processes in the pool.
+        no_multiprocessing(bool): process requests in the serving process without the pool.
+        stream_window(int): maximal number of documents of one process_stream call that are
+            processed simultaneously. The service stops reading the stream when the window is full.
+        pipeline_concurrency(dict): {<pipeline name> : <limit>}, maximal numbers of requests to
+            the pipelines processed simultaneously (a batch counts as one request). Other requests to
+            the pipeline wait in a queue, so slow pipelines can not occupy all workers.
+        micro_batch_size(dict): {<pipeline name> : <max batch size>}, enables micro-batching for the pipelines:
+            documents of concurrent requests (process and process_stream) to the pipeline are
+            processed together in one batch call of the pipeline.
+        micro_batch_wait(float): maximal time in seconds a document waits for other documents of the batch.
+        max_queue_size(dict): {<pipeline name> : <size>}, maximal numbers of requests waiting for the pipelines
+            in each priority lane. Requests above the limit are rejected with RESOURCE_EXHAUSTED. If the
+            concurrency of the pipeline is not specified, it is limited by max_workers.
+        warmup: sample document processed by every registered pipeline in every worker before
+            the worker accepts requests, so lazy model loading does not delay first requests.
+            The document is a tuple of pipeline inputs or a single input (e.g., text). Can be
+            a dictionary {<pipeline name> : <document>} to warm up specific pipelines.
+        convert_in_workers(bool): pass serialized requests to workers and receive serialized replies,
+            so the conversion from/to protobuf is performed by workers instead of the serving process,
+            and Python objects of annotations are not pickled between processes. In this mode,
+            the processing time in metrics includes the conversion time.
+        preload(bool): initialize (and warm up) pipelines in the serving process before forking
+            the workers, so the workers share memory pages of models with the serving process
+            (copy-on-write) instead of loading their own copies. Processors must tolerate fork after
+            initialization (e.g., should not start threads in init). See memory_report.
+        start_method(str): start method of worker processes ('fork', 'spawn', or 'forkserver'),
+            the default method of the platform if None. With 'spawn', pipelines are pickled into
+            every worker, so they should be declared by ProcessorSpec.
+        reply_cache(ReplyCache): cache of serialized replies of process and process_stream
+            (see nlp_service_cache.ReplyCache). Repeated documents are answered from the cache without
+            conversion and processing.
+
+    The priority of a request is specified in the metadata (key PRIORITY_METADATA_KEY,
+    values PRIORITY_INTERACTIVE (default) or PRIORITY_BULK). Waiting interactive requests are started
+    before bulk ones.
+
+    Requests whose gRPC deadline has expired are not processed, and requests waiting in the queues are
+    dropped when the client cancels the call. The remaining time of a request is available to
+    its pipeline via time_remaining() and is used as the timeout of nested ProcessorRemote calls.
     """
 
-    def __init__(self, ppls, max_workers=1, no_multiprocessing=False):
+    def __init__(self, ppls, max_workers=1, no_multiprocessing=False, stream_window=None,
+                 pipeline_concurrency=None, micro_batch_size=None, micro_batch_wait=0.005,
+                 max_queue_size=None, warmup=None, convert_in_workers=False, reply_cache=None, preload=False,
+                 start_method=None):
         self._pool = None
+        self._executor = None
+        self._stream_window = stream_window if stream_window is not None else 2 * max_workers
+        self._pipeline_names = list(ppls.keys())
+        self._metrics = nlp_service_metrics.ServiceMetrics(
+            self._pipeline_names + [name for ppl in ppls.values() if isinstance(ppl, PipelineCommon)
+                                    for name in _expand_ppl(ppl)])
+        pipeline_concurrency = pipeline_concurrency or {}
+        max_queue_size = max_queue_size or {}
+        self._queues = {name : _PipelineQueue(pipeline_concurrency.get(name, max_workers), max_queue_size.get(name))
+                        for name in set(pipeline_concurrency) | set(max_queue_size)}
+        self._convert_in_workers = convert_in_workers
+        self._reply_cache = reply_cache
+        if convert_in_workers:
+            self._process_document = _process_request_bytes
+            self._process_documents = _process_requests_bytes
+            self._process_batch = _process_batch_request_bytes
+        else:
+            self._process_document = _process_input
+            self._process_documents = _process_batch_input
+            self._process_batch = _process_batch_input
+
+        self._batchers = {name : _MicroBatcher(functools.partial(self._dispatch, name, self._process_documents, name),
+                                               max_size, micro_batch_wait)
+                          for name, max_size in (micro_batch_size or {}).items()}
+        if warmup is not None and type(warmup) is not dict:
+            warmup = {name : warmup for name in self._pipeline_names}
+
+        self._max_workers = max_workers
+        self._n_ready = None
         if no_multiprocessing:
-            _init_process(ppls)
+            _init_process(ppls, warmup)
+            self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        elif preload:
+            if start_method not in (None, 'fork'):
+                raise ValueError('Preloading requires the fork start method.')
+
+            _init_process(ppls, warmup)
+            # objects of the serving process are excluded from garbage collection,
+            # so the collector in workers does not write to (and copy) their pages
+            gc.freeze()
+            self._n_ready = multiprocessing.Value('i', 0)
+            self._pool = multiprocessing.get_context('fork').Pool(processes=max_workers,
+                                                                  initializer=_mark_ready,
+                                                                  initargs=(self._n_ready,))
         else:
-            #multiprocessing.set_start_method('spawn', force=True) # TODO: Fix multiprocessing for pytorch
-            self._pool = multiprocessing.Pool(processes=max_workers,
-                                              initializer=_init_process,
-                                              initargs=(ppls,))
+            mp_context = multiprocessing.get_context(start_method)
+            self._n_ready = mp_context.Value('i', 0)
+            self._pool = mp_context.Pool(processes=max_workers,
+                                         initializer=_init_process,
+                                         initargs=(ppls, warmup, self._n_ready))
+
+    def is_ready(self):
+        """Checks whether all workers are initialized and warmed up."""
+
+        return self._n_ready is None or self._n_ready.value >= self._max_workers
+
+    def wait_ready(self, timeout=None):
+        """Waits until all workers are initialized and warmed up.
+
+        Returns:
+            True if workers are ready, False if the timeout expired.
+        """
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self.is_ready():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+        return True
+
+    def memory_report(self):
+        """Returns memory usage of the serving process and workers.
+
+        The sum of RSS counts memory pages shared by processes (e.g., preloaded models) in every process,
+        while the sum of PSS divides them between processes and is the actual memory footprint.
+
+        Returns:
+            Dictionary {<pid> : <memory usage>} (see nlp_service_metrics.process_memory),
+            the serving process goes first.
+        """
+
+        pids = [os.getpid()] + ([worker.pid for worker in self._pool._pool] if self._pool is not None else [])
+        return collections.OrderedDict((pid, nlp_service_metrics.process_memory(pid)) for pid in pids)
 
     def process(self, request, context):
         """(gRPC method) Processes text document with a specified pipeline.
 
         The request contains the name of a pipeline to invoke and required annotations.
         """
-        input_annotations = annotation_from_protobuf.convert_annotation(request.input_annotations)
 
-        logger.info('Processing incoming request with "{}"...'.format(request.pipeline_name))
-        if self._pool is not None:
-            res = self._pool.apply(_process_input, args=(request.pipeline_name, input_annotations))
+        ppl_name, request_id, cache_key, res = self._dispatch_request(request, _priority(context), _deadline(context))
+        _cancel_on_termination(context, res)
+
+        logger.debug('Processing incoming request with "{}"...'.format(ppl_name))
+        res = self._wait(ppl_name, res, context)
+        logger.debug('Processing completed.')
+
+        return self._make_reply(ppl_name, res, request_id, cache_key)
+
+    def process_stream(self, request_iterator, context):
+        """(gRPC method) Processes a stream of documents.
+
+        Up to stream_window documents are processed simultaneously. Replies are returned in the order
+        of requests and are tagged with their request ids.
+        """
+
+        window = threading.Semaphore(self._stream_window)
+        pending = queue.Queue()
+        end = object()
+        priority = _priority(context)
+        deadline = _deadline(context)
+        dispatched = set()
+        lock = threading.Lock()
+
+        def cancel():
+            with lock:
+                for future in list(dispatched):
+                    future.cancel()
+
+        context.add_callback(cancel)
+
+        def read():
+            try:
+                for request in request_iterator:
+                    while not window.acquire(timeout=1.):
+                        if not context.is_active():
+                            return
+
+                    item = self._dispatch_request(request, priority, deadline)
+                    with lock:
+                        dispatched.add(item[-1])
+                    if not context.is_active():
+                        cancel()
+                    pending.put(item)
+            except Exception as err:
+                pending.put((None, None, None, err))
+            finally:
+                pending.put(end)
+
+        threading.Thread(target=read, daemon=True).start()
+
+        logger.debug('Processing incoming stream...')
+        n_docs = 0
+        while True:
+            item = pending.get()
+            if item is end:
+                break
+
+            ppl_name, request_id, cache_key, res = item
+            if isinstance(res, Exception):
+                raise res
+
+            reply = self._make_reply(ppl_name, self._wait(ppl_name, res, context), request_id, cache_key)
+            with lock:
+                dispatched.discard(res)
+            window.release()
+            n_docs += 1
+            yield reply
+
+        logger.debug('Processing of the stream completed ({} documents).'.format(n_docs))
+
+    def process_batch(self, request, context):
+        """(gRPC method) Processes a batch of documents with a specified pipeline.
+
+        The whole batch is passed to the batch path of the pipeline in one call.
+        """
+
+        ppl_name, batch = self._read_batch_request(request)
+        res = self._dispatch_batch(ppl_name, batch, _priority(context), _deadline(context))
+        _cancel_on_termination(context, res)
+
+        logger.debug('Processing incoming batch with "{}"...'.format(ppl_name))
+        res = self._wait(ppl_name, res, context)
+        logger.debug('Processing completed.')
+
+        return self._make_batch_reply(ppl_name, res)
+
+    def get_stats(self, request, context):
+        """(gRPC method) Outputs metrics of the service."""
+
+        return nlp_service_metrics.stats_to_protobuf(self.stats())
+
+    def stats(self):
+        """Returns metrics of the service (see ServiceMetrics.snapshot)."""
+
+        return self._metrics.snapshot(queued={name : pipeline_queue.queue_size()
+                                              for name, pipeline_queue in self._queues.items()})
+
+    def _wait(self, ppl_name, future, context):
+        try:
+            return future.result()
+        except QueueFullError as err:
+            self._metrics.inc(ppl_name, 'rejected')
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(err))
+        except DeadlineExceededError as err:
+            self._metrics.inc(ppl_name, 'cancelled')
+            context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, str(err))
+        except futures.CancelledError:
+            self._metrics.inc(ppl_name, 'cancelled')
+            context.abort(grpc.StatusCode.CANCELLED, 'The call is cancelled.')
+        except Exception:
+            self._metrics.inc(ppl_name, 'errors')
+            raise
+
+    def _dispatch_document(self, ppl_name, input_annotations, priority=PRIORITY_INTERACTIVE, deadline=None):
+        batcher = self._batchers.get(ppl_name)
+        if batcher is not None:
+            future = batcher.submit(input_annotations, priority, deadline)
         else:
-            res = _process_input(request.pipeline_name, input_annotations)
-        logger.info('Processing completed.')
-        
-        pb_res = annotation_to_protobuf.convert_annotation(res)
-        reply = pb.ProcessReply()
-        reply.output_annotations.Pack(pb_res)
+            future = self._dispatch(ppl_name, self._process_document, ppl_name, input_annotations,
+                                    priority=priority, deadline=deadline)
 
+        self._metrics.track(ppl_name, future)
+        return future
+
+    def _dispatch_batch(self, ppl_name, batch, priority=PRIORITY_INTERACTIVE, deadline=None):
+        if deadline is not None and time.time() >= deadline:
+            return _failed_future(DeadlineExceededError('The deadline expired before dispatching.'))
+
+        future = self._dispatch(ppl_name, self._process_batch, ppl_name, batch, priority=priority, deadline=deadline)
+        self._metrics.track(ppl_name, future)
+        return future
+
+    def _dispatch(self, ppl_name, func, *args, priority=PRIORITY_INTERACTIVE, deadline=None):
+        """Runs func(*args) in a worker within the concurrency limit of the pipeline.
+
+        Returns:
+            concurrent.futures.Future with the result. If the queue of the pipeline is full,
+            the future contains QueueFullError. If the deadline (time.time() based) expires before
+            the worker starts processing, the future contains DeadlineExceededError.
+        """
+
+        submitted = time.time()
+        pipeline_queue = self._queues.get(ppl_name)
+        if pipeline_queue is not None:
+            return pipeline_queue.submit(lambda: self._submit(ppl_name, submitted, deadline, func, *args), priority)
+
+        return self._submit(ppl_name, submitted, deadline, func, *args)
+
+    def _submit(self, ppl_name, submitted, deadline, func, *args):
+        if deadline is not None and time.time() >= deadline:
+            return _failed_future(DeadlineExceededError('The deadline expired in the queue.'))
+
+        future = futures.Future()
+
+        def finish(timed_result):
+            started, duration, res = timed_result
+            self._metrics.observe(ppl_name, 'queue_time', max(started - submitted, 0.))
+            self._metrics.observe(ppl_name, 'processing_time', duration)
+            _set_result(future, res)
+
+        if self._pool is None:
+            inner = self._executor.submit(_run_timed, deadline, func, *args)
+            inner.add_done_callback(lambda f: finish(f.result()) if f.exception() is None
+                                    else _set_exception(future, f.exception()))
+        else:
+            self._pool.apply_async(_run_timed, args=(deadline, func) + args,
+                                   callback=finish,
+                                   error_callback=functools.partial(_set_exception, future))
+        return future
+
+    def _dispatch_request(self, request, priority=PRIORITY_INTERACTIVE, deadline=None):
+        """Reads the request and dispatches its document unless the reply is found in the cache
+        or the deadline has expired.
+
+        Returns:
+            The pipeline name, the request id, the cache key (None if the cache is disabled), and
+            concurrent.futures.Future with the result (_CachedReply on a cache hit).
+        """
+
+        if self._convert_in_workers:
+            # only the header is parsed, annotations are kept as unknown fields (or bytes)
+            header_class = pb.ProcessRequestHeader if self._reply_cache is None else pb.ProcessRequestKey
+            header = header_class.FromString(request)
+            ppl_name, request_id = header.pipeline_name, header.request_id
+            self._count_request(ppl_name, len(request))
+        else:
+            ppl_name, request_id = request.pipeline_name, request.request_id
+            self._count_request(ppl_name, request.ByteSize())
+
+        cache_key = None
+        if self._reply_cache is not None:
+            cache_key = self._reply_cache.make_key(ppl_name, header.input_annotations if self._convert_in_workers
+                                                   else request.input_annotations.SerializeToString())
+            reply = self._reply_cache.get(cache_key)
+            if reply is not None:
+                self._metrics.inc(ppl_name, 'cache_hits')
+                future = futures.Future()
+                future.set_result(_CachedReply(reply))
+                return ppl_name, request_id, cache_key, future
+
+        if deadline is not None and time.time() >= deadline:
+            return (ppl_name, request_id, cache_key,
+                    _failed_future(DeadlineExceededError('The deadline expired before dispatching.')))
+
+        if self._convert_in_workers:
+            input_annotations = request
+        else:
+            input_annotations = self._decode(ppl_name, request.input_annotations)
+
+        return (ppl_name, request_id, cache_key,
+                self._dispatch_document(ppl_name, input_annotations, priority, deadline))
+
+    def _read_batch_request(self, request):
+        if self._convert_in_workers:
+            header = pb.ProcessRequestHeader.FromString(request)
+            self._count_request(header.pipeline_name, len(request))
+            return header.pipeline_name, request
+
+        self._count_request(request.pipeline_name, request.ByteSize())
+        return request.pipeline_name, [self._decode(request.pipeline_name, e) for e in request.input_annotations]
+
+    def _count_request(self, ppl_name, size):
+        self._metrics.inc(ppl_name, 'requests')
+        self._metrics.observe(ppl_name, 'request_bytes', size)
+
+    def _decode(self, ppl_name, pb_ann):
+        start = time.perf_counter()
+        res = annotation_from_protobuf.convert_annotation(pb_ann)
+        self._metrics.observe(ppl_name, 'conversion_time', time.perf_counter() - start)
+        return res
+
+    def _make_reply(self, ppl_name, res, request_id='', cache_key=None):
+        if isinstance(res, _CachedReply):
+            self._metrics.observe(ppl_name, 'response_bytes', len(res.reply))
+            return _with_request_id(res.reply, request_id)
+
+        if not self._convert_in_workers and cache_key is None:
+            return self._encode(ppl_name, res, lambda: _reply_message(res, request_id))
+
+        # replies are serialized without request ids, so they can be cached
+        reply = self._encode(ppl_name, res, lambda: _reply_message(res).SerializeToString())
+        if cache_key is not None:
+            self._reply_cache.put(cache_key, reply)
+
+        return _with_request_id(reply, request_id)
+
+    def _make_batch_reply(self, ppl_name, res):
+        return self._encode(ppl_name, res, lambda: _batch_reply_message(res))
+
+    def _encode(self, ppl_name, res, make_message):
+        if self._convert_in_workers:
+            reply, conversion_time = res
+        else:
+            start = time.perf_counter()
+            reply = make_message()
+            conversion_time = time.perf_counter() - start
+
+        self._metrics.observe(ppl_name, 'conversion_time', conversion_time)
+        self._metrics.observe(ppl_name, 'response_bytes', len(reply) if type(reply) is bytes else reply.ByteSize())
         return reply
 
     def get_registered_pipelines(self, request, context):
         """(gRPC method) Outputs pipelines registered in the service."""
 
-        repl = RegisteredPipelinesReply()
-        #for e in self._ppl.keys():
-        for e in PPLS.keys():
-            repl.add(e)
-        return repl
+        return pb.RegisteredPipelinesReply(pipeline_names=self._pipeline_names)
 
     def add_to_server(self, server):
         """Is required for adding service to server.
@@ -90,4 +789,136 @@ class NlpService(annotation_pb2_grpc.NlpServiceServicer):
         Is invoked by NlpServiceServer.
         """
 
-        annotation_pb2_grpc.add_NlpServiceServicer_to_server(self, server)
+        if not self._convert_in_workers and self._reply_cache is None:
+            annotation_pb2_grpc.add_NlpServiceServicer_to_server(self, server)
+            return
+
+        # replies of process and process_stream are serialized by the service,
+        # in convert_in_workers mode requests and replies of processing methods are passed as bytes
+        raw = self._convert_in_workers
+        rpc_method_handlers = {
+            'process': grpc.unary_unary_rpc_method_handler(
+                self.process,
+                request_deserializer=None if raw else pb.ProcessRequest.FromString),
+            'process_stream': grpc.stream_stream_rpc_method_handler(
+                self.process_stream,
+                request_deserializer=None if raw else pb.ProcessRequest.FromString),
+            'process_batch': grpc.unary_unary_rpc_method_handler(
+                self.process_batch,
+                request_deserializer=None if raw else pb.ProcessBatchRequest.FromString,
+                response_serializer=None if raw else pb.ProcessBatchReply.SerializeToString),
+            'get_registered_pipelines': grpc.unary_unary_rpc_method_handler(
+                self.get_registered_pipelines,
+                request_deserializer=pb.Void.FromString,
+                response_serializer=pb.RegisteredPipelinesReply.SerializeToString),
+            'get_stats': grpc.unary_unary_rpc_method_handler(
+                self.get_stats,
+                request_deserializer=pb.Void.FromString,
+                response_serializer=pb.StatsReply.SerializeToString)
+        }
+        server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler('NlpService', rpc_method_handlers),))
+
+
+class NlpServiceAsync(NlpService):
+    """NLP gRPC annotation service for the asyncio server (grpc.aio).
+
+    Requests wait for results of the pool in the event loop, so they do not occupy threads.
+    Takes the same arguments as NlpService.
+    """
+
+    async def process(self, request, context):
+        """(gRPC method) Processes text document with a specified pipeline."""
+
+        ppl_name, request_id, cache_key, res = self._dispatch_request(request, _priority(context), _deadline(context))
+
+        logger.debug('Processing incoming request with "{}"...'.format(ppl_name))
+        res = await self._await(ppl_name, res, context)
+        logger.debug('Processing completed.')
+
+        return self._make_reply(ppl_name, res, request_id, cache_key)
+
+    async def process_stream(self, request_iterator, context):
+        """(gRPC method) Processes a stream of documents (see NlpService.process_stream)."""
+
+        window = asyncio.Semaphore(self._stream_window)
+        pending = asyncio.Queue()
+        end = object()
+        priority = _priority(context)
+        deadline = _deadline(context)
+
+        async def read():
+            try:
+                async for request in request_iterator:
+                    await window.acquire()
+                    pending.put_nowait(self._dispatch_request(request, priority, deadline))
+            except Exception as err:
+                pending.put_nowait((None, None, None, err))
+            finally:
+                pending.put_nowait(end)
+
+        reader = asyncio.ensure_future(read())
+
+        logger.debug('Processing incoming stream...')
+        n_docs = 0
+        try:
+            while True:
+                item = await pending.get()
+                if item is end:
+                    break
+
+                ppl_name, request_id, cache_key, res = item
+                if isinstance(res, Exception):
+                    raise res
+
+                reply = self._make_reply(ppl_name, await self._await(ppl_name, res, context), request_id, cache_key)
+                window.release()
+                n_docs += 1
+                yield reply
+        finally:
+            reader.cancel()
+            # documents that are not processed yet are dropped if the call terminates
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not end:
+                    item[-1].cancel()
+
+        logger.debug('Processing of the stream completed ({} documents).'.format(n_docs))
+
+    async def process_batch(self, request, context):
+        """(gRPC method) Processes a batch of documents with a specified pipeline."""
+
+        ppl_name, batch = self._read_batch_request(request)
+
+        logger.debug('Processing incoming batch with "{}"...'.format(ppl_name))
+        res = await self._await(ppl_name, self._dispatch_batch(ppl_name, batch, _priority(context), _deadline(context)),
+                                context)
+        logger.debug('Processing completed.')
+
+        return self._make_batch_reply(ppl_name, res)
+
+    async def get_stats(self, request, context):
+        """(gRPC method) Outputs metrics of the service."""
+
+        return NlpService.get_stats(self, request, context)
+
+    async def get_registered_pipelines(self, request, context):
+        """(gRPC method) Outputs pipelines registered in the service."""
+
+        return NlpService.get_registered_pipelines(self, request, context)
+
+    async def _await(self, ppl_name, future, context):
+        # if the call terminates, the handler is cancelled, and the cancellation is propagated to the future
+        try:
+            return await asyncio.wrap_future(future)
+        except QueueFullError as err:
+            self._metrics.inc(ppl_name, 'rejected')
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(err))
+        except DeadlineExceededError as err:
+            self._metrics.inc(ppl_name, 'cancelled')
+            await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, str(err))
+        except (asyncio.CancelledError, futures.CancelledError):
+            self._metrics.inc(ppl_name, 'cancelled')
+            raise
+        except Exception:
+            self._metrics.inc(ppl_name, 'errors')
+            raise
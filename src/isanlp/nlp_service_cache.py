@@ -0,0 +1,83 @@
+import collections
+import hashlib
+import threading
+import time
+
+
+class ReplyCache:
+    """Cache of serialized replies of NlpService.
+
+    Keys are hashes of the pipeline name and serialized input annotations of requests, values are
+    serialized replies, so a cache hit skips conversion and processing of the request entirely.
+    Least recently used replies are evicted when the cache exceeds the size limits.
+
+    Args:
+        max_size(int): maximal number of stored replies.
+        max_bytes(int): maximal total size of stored replies in bytes (not limited if None).
+        ttl(float): time in seconds after which a stored reply expires (never expires if None).
+
+    Example:
+        NlpServiceServer(ppls, reply_cache = ReplyCache(max_size = 100000, max_bytes = 2**30, ttl = 3600))
+    """
+
+    def __init__(self, max_size = 10000, max_bytes = None, ttl = None):
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._replies = collections.OrderedDict()
+        self._n_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, ppl_name, input_annotations):
+        """Makes a key from the pipeline name and serialized input annotations (bytes)."""
+
+        hsh = hashlib.sha256(ppl_name.encode('utf8'))
+        hsh.update(b'\0')
+        hsh.update(input_annotations)
+        return hsh.digest()
+
+    def get(self, key):
+        """Returns the stored reply or None."""
+
+        with self._lock:
+            item = self._replies.get(key)
+            if item is not None and self._ttl is not None and item[0] <= time.monotonic():
+                self._remove(key)
+                item = None
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            self._replies.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, reply):
+        if self._max_bytes is not None and len(reply) > self._max_bytes:
+            return
+
+        expires = time.monotonic() + self._ttl if self._ttl is not None else None
+        with self._lock:
+            if key in self._replies:
+                self._remove(key)
+
+            self._replies[key] = (expires, reply)
+            self._n_bytes += len(reply)
+            while (len(self._replies) > self._max_size
+                   or (self._max_bytes is not None and self._n_bytes > self._max_bytes)):
+                self._remove(next(iter(self._replies)))
+
+    def clear(self):
+        with self._lock:
+            self._replies.clear()
+            self._n_bytes = 0
+
+    def __len__(self):
+        return len(self._replies)
+
+    def _remove(self, key):
+        _, reply = self._replies.pop(key)
+        self._n_bytes -= len(reply)
@@ -0,0 +1,273 @@
+"""Metrics of NlpService: counters, gauges, and histograms per pipeline."""
+
+import bisect
+import collections
+import http.server
+import threading
+
+from . import annotation_pb2 as pb
+
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10., 30., 60.)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256 bytes ... 64 MB
+
+COUNTERS = ('requests', 'errors', 'rejected', 'cache_hits', 'cancelled')
+GAUGES = ('in_flight', 'queued')
+HISTOGRAMS = collections.OrderedDict([('queue_time', TIME_BUCKETS),
+                                      ('processing_time', TIME_BUCKETS),
+                                      ('conversion_time', TIME_BUCKETS),
+                                      ('request_bytes', SIZE_BUCKETS),
+                                      ('response_bytes', SIZE_BUCKETS)])
+
+_DESCRIPTIONS = {
+    'requests' : 'Number of requests (documents of streams are counted separately).',
+    'errors' : 'Number of requests failed with an error.',
+    'rejected' : 'Number of requests rejected since the queue of the pipeline was full.',
+    'cache_hits' : 'Number of requests answered from the reply cache.',
+    'cancelled' : 'Number of requests skipped or abandoned since the client cancelled the call or its deadline expired.',
+    'in_flight' : 'Number of requests accepted, but not completed yet.',
+    'queued' : 'Number of requests waiting in the queue of the pipeline.',
+    'queue_time' : 'Time from dispatching to the start of processing in a worker, seconds.',
+    'processing_time' : 'Processing time in a worker (a batch is processed in one call), seconds.',
+    'conversion_time' : 'Time of conversion of requests and replies from/to protobuf, seconds.',
+    'request_bytes' : 'Size of requests, bytes.',
+    'response_bytes' : 'Size of replies, bytes.'
+}
+
+UNKNOWN_PIPELINE = '_unknown'
+
+
+class Histogram:
+    """Histogram with fixed bucket bounds (not cumulative counts, the last bucket is +Inf)."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def copy(self):
+        result = Histogram(self.bounds)
+        result.counts = list(self.counts)
+        result.count = self.count
+        result.sum = self.sum
+        return result
+
+
+class _PipelineMetrics:
+    def __init__(self):
+        self.counters = {name : 0 for name in COUNTERS}
+        self.in_flight = 0
+        self.histograms = {name : Histogram(bounds) for name, bounds in HISTOGRAMS.items()}
+
+
+class ServiceMetrics:
+    """Thread-safe storage of metrics of NlpService.
+
+    Args:
+        pipeline_names(list): names of pipelines of the service. Metrics of requests to other
+            names are accumulated under UNKNOWN_PIPELINE.
+    """
+
+    def __init__(self, pipeline_names):
+        self._lock = threading.Lock()
+        self._pipelines = collections.OrderedDict((name, _PipelineMetrics()) for name in pipeline_names)
+        self._pipelines[UNKNOWN_PIPELINE] = _PipelineMetrics()
+
+    def inc(self, ppl_name, counter, value=1):
+        with self._lock:
+            self._get(ppl_name).counters[counter] += value
+
+    def observe(self, ppl_name, histogram, value):
+        with self._lock:
+            self._get(ppl_name).histograms[histogram].observe(value)
+
+    def track(self, ppl_name, future):
+        """Counts the request in flight until the future is done."""
+
+        with self._lock:
+            self._get(ppl_name).in_flight += 1
+
+        future.add_done_callback(lambda f: self._finish(ppl_name))
+
+    def snapshot(self, queued=None):
+        """Returns metrics.
+
+        Args:
+            queued(dict): {<pipeline name> : <number of requests waiting in the queue>}.
+
+        Returns:
+            Dictionary {<pipeline name> : <metrics>}. Metrics is a dictionary with counters, gauges,
+            and Histogram objects.
+        """
+
+        queued = queued or {}
+        result = collections.OrderedDict()
+        with self._lock:
+            for name, metrics in self._pipelines.items():
+                stats = dict(metrics.counters)
+                stats['in_flight'] = metrics.in_flight
+                stats['queued'] = queued.get(name, 0)
+                stats.update({key : hist.copy() for key, hist in metrics.histograms.items()})
+                result[name] = stats
+
+        return result
+
+    def _finish(self, ppl_name):
+        with self._lock:
+            self._get(ppl_name).in_flight -= 1
+
+    def _get(self, ppl_name):
+        metrics = self._pipelines.get(ppl_name)
+        return metrics if metrics is not None else self._pipelines[UNKNOWN_PIPELINE]
+
+
+def stats_to_protobuf(snapshot):
+    reply = pb.StatsReply()
+    for name, stats in snapshot.items():
+        pb_stats = reply.pipelines.add(pipeline_name=name)
+        for key in COUNTERS + GAUGES:
+            setattr(pb_stats, key, stats[key])
+
+        for key in HISTOGRAMS:
+            hist = stats[key]
+            pb_stats.histograms[key].bounds.extend(hist.bounds)
+            pb_stats.histograms[key].counts.extend(hist.counts)
+            pb_stats.histograms[key].count = hist.count
+            pb_stats.histograms[key].sum = hist.sum
+
+    return reply
+
+
+def stats_from_protobuf(reply):
+    result = collections.OrderedDict()
+    for pb_stats in reply.pipelines:
+        stats = {key : getattr(pb_stats, key) for key in COUNTERS + GAUGES}
+        for key, pb_hist in pb_stats.histograms.items():
+            hist = Histogram(tuple(pb_hist.bounds))
+            hist.counts = list(pb_hist.counts)
+            hist.count = pb_hist.count
+            hist.sum = pb_hist.sum
+            stats[key] = hist
+
+        result[pb_stats.pipeline_name] = stats
+
+    return result
+
+
+def format_prometheus(snapshot, prefix='isanlp'):
+    """Formats metrics in the Prometheus text exposition format."""
+
+    def label(name, **extra):
+        labels = [('pipeline', name)] + sorted(extra.items())
+        return '{' + ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                              for k, v in labels) + '}'
+
+    lines = []
+    for key in COUNTERS:
+        metric = '{}_{}_total'.format(prefix, key)
+        lines += ['# HELP {} {}'.format(metric, _DESCRIPTIONS[key]), '# TYPE {} counter'.format(metric)]
+        lines += ['{}{} {}'.format(metric, label(name), stats[key]) for name, stats in snapshot.items()]
+
+    for key in GAUGES:
+        metric = '{}_{}'.format(prefix, key)
+        lines += ['# HELP {} {}'.format(metric, _DESCRIPTIONS[key]), '# TYPE {} gauge'.format(metric)]
+        lines += ['{}{} {}'.format(metric, label(name), stats[key]) for name, stats in snapshot.items()]
+
+    for key in HISTOGRAMS:
+        metric = '{}_{}'.format(prefix, key if key.endswith('bytes') else key + '_seconds')
+        lines += ['# HELP {} {}'.format(metric, _DESCRIPTIONS[key]), '# TYPE {} histogram'.format(metric)]
+        for name, stats in snapshot.items():
+            hist = stats[key]
+            cumulative = 0
+            for bound, count in zip(list(hist.bounds) + ['+Inf'], hist.counts):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(metric, label(name, le=bound), cumulative))
+
+            lines.append('{}_sum{} {}'.format(metric, label(name), hist.sum))
+            lines.append('{}_count{} {}'.format(metric, label(name), hist.count))
+
+    return '\n'.join(lines) + '\n'
+
+
+def process_memory(pid):
+    """Reads memory usage of the process from /proc/<pid>/smaps_rollup (Linux 4.14+).
+
+    Returns:
+        Dictionary {'rss' : <bytes>, 'pss' : <bytes>, 'shared' : <bytes>, 'private' : <bytes>},
+        or None if the information is unavailable.
+    """
+
+    try:
+        with open('/proc/{}/smaps_rollup'.format(pid)) as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    values = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == 'kB':
+            values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+
+    return {'rss' : values.get('Rss', 0),
+            'pss' : values.get('Pss', 0),
+            'shared' : values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0),
+            'private' : values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)}
+
+
+def format_memory_report(report):
+    """Formats the memory report of NlpService (see NlpService.memory_report) as a table in MB."""
+
+    keys = ('rss', 'pss', 'shared', 'private')
+    lines = ['{:>10}'.format('pid') + ''.join('{:>10}'.format(key.upper()) for key in keys)]
+    totals = dict.fromkeys(keys, 0)
+    for pid, usage in report.items():
+        if usage is None:
+            lines.append('{:>10}{:>10}'.format(pid, 'n/a'))
+            continue
+
+        lines.append('{:>10}'.format(pid) + ''.join('{:>10.1f}'.format(usage[key] / 2 ** 20) for key in keys))
+        for key in keys:
+            totals[key] += usage[key]
+
+    lines.append('{:>10}'.format('total') + ''.join('{:>10.1f}'.format(totals[key] / 2 ** 20) for key in keys))
+    return '\n'.join(lines)
+
+
+def start_http_server(get_snapshot, port, host=''):
+    """Serves metrics in the Prometheus text format at http://<host>:<port>/metrics in a background thread.
+
+    Args:
+        get_snapshot: function that returns the snapshot of metrics (see ServiceMetrics.snapshot).
+        port(int): port of the HTTP server.
+        host(str): address to bind (all interfaces by default).
+
+    Returns:
+        http.server.ThreadingHTTPServer object (call shutdown to stop it).
+    """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+
+            body = format_prometheus(get_snapshot()).encode('utf8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,7 +1,42 @@
+import asyncio
 import grpc
+import grpc.aio
 import time
 from concurrent import futures
-from .nlp_service import NlpService
+from .nlp_service import NlpService, NlpServiceAsync, _PRIORITIES
+from .nlp_service_metrics import start_http_server, format_memory_report
+from .grpc_options import compression_algorithm, make_options
+
+try:
+    from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+except ImportError:
+    health = None
+
+import logging
+logger = logging.getLogger('isanlp')
+
+
+_HEALTH_SERVICES = ('', 'NlpService')
+# the sync server handles each RPC in a thread, so queues of pipelines are bounded there by default
+_DEFAULT_SYNC_QUEUE_SIZE = 64
+
+
+def _sync_threads(ppl_names, max_workers, pipeline_concurrency, micro_batch_size, max_queue_size):
+    """Computes the number of threads of the sync server.
+
+    Each thread handles one RPC, including RPCs that wait in the queues of pipelines or fill micro-batches.
+    RPCs to pipelines without queues are limited by the number of workers. Threads are reserved for all
+    running and waiting requests of pipelines with queues, so these pipelines can not take threads
+    of other pipelines and their waiting requests reach the priority lanes.
+    """
+
+    queued = set(pipeline_concurrency) | set(max_queue_size)
+    n_threads = max_workers * max([micro_batch_size.get(name, 1) for name in ppl_names if name not in queued] + [1])
+    for name in queued:
+        n_requests = pipeline_concurrency.get(name, max_workers) + len(_PRIORITIES) * max_queue_size[name]
+        n_threads += n_requests * micro_batch_size.get(name, 1)
+
+    return n_threads
 
 
 class NlpServiceServer:
@@ -11,24 +46,149 @@ class NlpServiceServer:
         ppl(dict): Dictionary of pipelines that will be registered in the service.
         port(int): Serving port.
         max_workers(int): workers for gRPC server.
+        stream_window(int): maximal number of documents of one streaming call processed simultaneously.
+        use_asyncio(bool): run asyncio server (grpc.aio) that awaits results of workers in the event loop
+            instead of occupying a thread per request.
+        max_concurrent_rpcs(int): maximal number of simultaneously handled RPCs, the server rejects other
+            RPCs with RESOURCE_EXHAUSTED. Not limited by default (the sync server handles as many RPCs
+            simultaneously as it has threads, see max_queue_size, other RPCs wait inside gRPC).
+        pipeline_concurrency(dict): {<pipeline name> : <limit>}, maximal numbers of requests to the pipelines
+            processed simultaneously (see NlpService).
+        micro_batch_size(dict): {<pipeline name> : <max batch size>}, pipelines that process documents of
+            concurrent requests in batches (see NlpService).
+        micro_batch_wait(float): maximal time in seconds a document waits for other documents of the batch.
+        max_queue_size(dict): {<pipeline name> : <size>}, maximal numbers of requests waiting for the pipelines
+            in each priority lane, other requests are rejected with RESOURCE_EXHAUSTED (see NlpService).
+            The sync server handles each RPC in a thread and reserves threads for all running and waiting
+            requests of pipelines listed in pipeline_concurrency or max_queue_size, so a saturated pipeline
+            does not delay requests to other pipelines. For pipelines listed only in pipeline_concurrency,
+            the sync server bounds each lane by 64 requests.
+        metrics_port(int): port of the HTTP endpoint that exposes metrics of the service in the Prometheus
+            text format (http://<host>:<metrics_port>/metrics). The endpoint is disabled if None.
+        warmup: sample document processed by the pipelines in every worker before serving (see NlpService).
+        convert_in_workers(bool): convert requests and replies from/to protobuf in workers (see NlpService).
+        reply_cache(ReplyCache): cache of serialized replies (see NlpService and nlp_service_cache.ReplyCache).
+        preload(bool): initialize pipelines before forking workers, so they share memory of models (see NlpService).
+            The memory report of the service is logged when it is ready.
+        start_method(str): start method of worker processes: 'fork', 'spawn', or 'forkserver' (see NlpService).
+        compression(str): compression of replies: None, 'gzip', or 'deflate'.
+        max_send_message_length(int): maximal size of replies in bytes (-1 for no limit).
+        max_receive_message_length(int): maximal size of requests in bytes (-1 for no limit, the gRPC
+            default is 4 MB).
+        keepalive_time(float): interval in seconds between keepalive pings sent by the server.
+        keepalive_timeout(float): time in seconds to wait for the ping acknowledgement.
+        min_ping_interval(float): minimal allowed interval in seconds between keepalive pings of clients.
+        server_options(list): additional options of the gRPC server [(<name>, <value>), ...].
+
+    If grpcio-health-checking is installed, the server provides the standard gRPC health service
+    that reports NOT_SERVING until all workers are initialized and warmed up. Otherwise, the server
+    starts listening only after the warmup.
     """
 
-    def __init__(self, ppls, port = 3333, max_workers = 1, no_multiprocessing=False):
+    def __init__(self, ppls, port = 3333, max_workers = 1, no_multiprocessing=False, stream_window=None,
+                 use_asyncio = False, max_concurrent_rpcs = None, pipeline_concurrency = None,
+                 micro_batch_size = None, micro_batch_wait = 0.005, max_queue_size = None,
+                 metrics_port = None, warmup = None, compression = None,
+                 max_send_message_length = None, max_receive_message_length = None,
+                 keepalive_time = None, keepalive_timeout = None, min_ping_interval = None,
+                 server_options = None, convert_in_workers = False, reply_cache = None,
+                 preload = False, start_method = None):
         self._port = port
         self._max_workers = max_workers
-        self._service = NlpService(ppls, max_workers, no_multiprocessing)
+        self._use_asyncio = use_asyncio
+        self._max_concurrent_rpcs = max_concurrent_rpcs
+        self._metrics_port = metrics_port
+        self._preload = preload
+        self._compression = compression_algorithm(compression)
+        self._options = make_options(max_send_message_length = max_send_message_length,
+                                     max_receive_message_length = max_receive_message_length,
+                                     keepalive_time = keepalive_time,
+                                     keepalive_timeout = keepalive_timeout,
+                                     min_ping_interval = min_ping_interval,
+                                     options = server_options)
+        self._n_threads = None
+        if not use_asyncio:
+            max_queue_size = dict(max_queue_size or {})
+            for name in pipeline_concurrency or {}:
+                max_queue_size.setdefault(name, _DEFAULT_SYNC_QUEUE_SIZE)
+
+            self._n_threads = _sync_threads(list(ppls), max_workers, pipeline_concurrency or {},
+                                            micro_batch_size or {}, max_queue_size)
+        service_class = NlpServiceAsync if use_asyncio else NlpService
+        self._service = service_class(ppls, max_workers, no_multiprocessing, stream_window=stream_window,
+                                      pipeline_concurrency=pipeline_concurrency,
+                                      micro_batch_size=micro_batch_size, micro_batch_wait=micro_batch_wait,
+                                      max_queue_size=max_queue_size, warmup=warmup,
+                                      convert_in_workers=convert_in_workers, reply_cache=reply_cache,
+                                      preload=preload, start_method=start_method)
 
     def serve(self):
         """Initiates server for listening of incoming connections (blocking)."""
 
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers = self._max_workers))
+        if self._metrics_port is not None:
+            start_http_server(self._service.stats, self._metrics_port)
+
+        if self._use_asyncio:
+            asyncio.run(self._serve_async())
+            return
+
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers = self._n_threads),
+                             options = self._options,
+                             maximum_concurrent_rpcs = self._max_concurrent_rpcs,
+                             compression = self._compression)
 
         self._service.add_to_server(server)
         server.add_insecure_port('[::]:{}'.format(self._port))
-        server.start()
+        if health is None:
+            self._service.wait_ready()
+            server.start()
+        else:
+            health_servicer = health.HealthServicer()
+            self._set_health(health_servicer, health_pb2.HealthCheckResponse.NOT_SERVING)
+            health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+            server.start()
+            self._service.wait_ready()
+            self._set_health(health_servicer, health_pb2.HealthCheckResponse.SERVING)
 
+        self._log_ready()
         try:
             while True:
                 time.sleep(60)
         except KeyboardInterrupt:
             server.stop(0)
+
+    async def _serve_async(self):
+        server = grpc.aio.server(options = self._options,
+                                 maximum_concurrent_rpcs = self._max_concurrent_rpcs,
+                                 compression = self._compression)
+
+        self._service.add_to_server(server)
+        server.add_insecure_port('[::]:{}'.format(self._port))
+        loop = asyncio.get_running_loop()
+        if health is None:
+            await loop.run_in_executor(None, self._service.wait_ready)
+            await server.start()
+        else:
+            health_servicer = health.aio.HealthServicer()
+            for service in _HEALTH_SERVICES:
+                await health_servicer.set(service, health_pb2.HealthCheckResponse.NOT_SERVING)
+            health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+            await server.start()
+            await loop.run_in_executor(None, self._service.wait_ready)
+            for service in _HEALTH_SERVICES:
+                await health_servicer.set(service, health_pb2.HealthCheckResponse.SERVING)
+
+        self._log_ready()
+        try:
+            await server.wait_for_termination()
+        finally:
+            await server.stop(0)
+
+    def _log_ready(self):
+        logger.info('The server is ready.')
+        if self._preload:
+            logger.info('Memory usage of the service, MB:\n' + format_memory_report(self._service.memory_report()))
+
+    def _set_health(self, health_servicer, status):
+        for service in _HEALTH_SERVICES:
+            health_servicer.set(service, status)
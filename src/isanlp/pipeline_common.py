@@ -1,3 +1,158 @@
+import asyncio
+from concurrent import futures
+import contextvars
+import functools
+import inspect
+import queue
+import threading
+
+
+# Instrumentation hooks and the path of the running stage, inherited by nested pipelines
+_hooks_context = contextvars.ContextVar('isanlp_pipeline_hooks', default = None)
+# Executor for synchronous processors in the asyncio mode, inherited by nested pipelines
+_async_executor_context = contextvars.ContextVar('isanlp_async_executor', default = None)
+
+
+def call_batch(proc, batch):
+    """Invokes a processor on a batch of documents.
+    
+    If the processor implements an optional batch method (``batch_call`` or ``pipe``), the whole batch 
+    is passed to it at once. Otherwise, the processor is called for each document separately.
+    
+    Args:
+        proc: processor object.
+        batch(list): list of tuples of input annotations (one tuple per document).
+        
+    Returns:
+        List of processor results (one result per document).
+        
+    Raises:
+        ValueError: if the batch method returns a wrong number of results.
+    """
+    
+    for method in ('batch_call', 'pipe'):
+        if hasattr(proc, method):
+            results = list(getattr(proc, method)(batch))
+            if len(results) != len(batch):
+                raise ValueError('Method {} of the processor {} returned {} results for a batch of {} documents.'
+                                 .format(method, type(proc).__name__, len(results), len(batch)))
+            
+            return results
+    
+    return [proc(*args) for args in batch]
+
+
+def _call_instrumented(hooks, path, stage_name, input_data, call):
+    for hook in hooks:
+        hook.on_stage_start(path, stage_name, input_data)
+    
+    token = _hooks_context.set((hooks, '{}/{}'.format(path, stage_name)))
+    try:
+        results = call()
+    except BaseException as err:
+        for hook in hooks:
+            hook.on_stage_end(path, stage_name, input_data, None, err)
+        raise
+    finally:
+        _hooks_context.reset(token)
+    
+    for hook in hooks:
+        hook.on_stage_end(path, stage_name, input_data, results, None)
+    
+    return results
+
+
+def _is_coroutine(proc):
+    return inspect.iscoroutinefunction(proc) or inspect.iscoroutinefunction(getattr(proc, '__call__', None))
+
+
+async def _ainvoke(proc, args, executor = None):
+    """Invokes a processor in the asyncio mode.
+    
+    Processors with method acall and coroutine functions are awaited natively, synchronous processors 
+    are run in the executor. If the executor is None, the async_executor of the enclosing PipelineCommon 
+    is used, or the default executor of the event loop if there is no such pipeline.
+    """
+    
+    if hasattr(proc, 'acall'):
+        return await proc.acall(*args)
+    
+    if _is_coroutine(proc):
+        return await proc(*args)
+    
+    if executor is None:
+        executor = _async_executor_context.get()
+    
+    # the context carries instrumentation hooks and the executor to nested pipelines
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(ctx.run, proc, *args))
+
+
+class _Stage:
+    """Compiled pipeline stage.
+    
+    Holds a processor together with precomputed accessors to the annotation dictionary of the pipeline.
+    """
+    
+    def __init__(self, name, proc, proc_input, proc_output):
+        self.name = name
+        self.proc = proc
+        self.reads = set(proc_input)
+        self.writes = set(e for e in proc_output.values() if e)
+        self.dependencies = set()
+        self.none_checks = []
+        self.drops = []
+        self.get_args = self._make_getter(list(proc_input))
+        self.store = self._make_setter([(proc_label, ppl_label) 
+                                        for (proc_label, ppl_label) in proc_output.items() 
+                                        if ppl_label])
+    
+    @staticmethod
+    def _make_getter(proc_input):
+        if len(proc_input) == 1:
+            name = proc_input[0]
+            return lambda result: (result[name],)
+        
+        return lambda result: tuple([result[e] for e in proc_input])
+    
+    @staticmethod
+    def _make_setter(labels):
+        def store(result, results):
+            if type(results) is tuple or type(results) is dict:
+                for proc_label, ppl_label in labels:
+                    result[ppl_label] = results[proc_label]
+            else:
+                for proc_label, ppl_label in labels:
+                    if proc_label != 0:
+                        raise KeyError(proc_label)
+                    result[ppl_label] = results
+        
+        return store
+    
+    def run(self, result, hooks = None, path = None):
+        args = self.get_args(result)
+        if hooks is None:
+            results = self.proc(*args)
+        else:
+            results = _call_instrumented(hooks, path, self.name, args, lambda: self.proc(*args))
+        
+        self.store(result, results)
+        self.finish(result)
+    
+    def check_none(self, result):
+        for k in self.none_checks:
+            if k in result and result[k] is None:
+                del result[k]
+    
+    def drop_dead(self, result):
+        for k in self.drops:
+            result.pop(k, None)
+    
+    def finish(self, result):
+        self.check_none(result)
+        self.drop_dead(result)
+
+
 class PipelineCommon:
     """The common pipeline of several processors.
     
@@ -13,6 +168,58 @@ class PipelineCommon:
             If name or number is ommited then result will not be stored in a piplene and will be dropped from further
             processing.
         name(str): The name of the pipeline. It is used for automatic pipeline naming in a gRPC server container.
+        executor(concurrent.futures.Executor): If specified, the pipeline builds a dependency graph of its 
+            processors from the names of their input and output annotations and runs independent processors 
+            concurrently in this executor (ThreadPoolExecutor or ProcessPoolExecutor). Processors that read, 
+            overwrite or drop annotations of each other are still executed in the declaration order, so the 
+            result is the same as in the sequential mode. Processors are called in the executor as is, so for 
+            ProcessPoolExecutor they should be picklable. The executor is not pickled with the pipeline, 
+            so a copy of the pipeline in another process runs its processors sequentially.
+        outputs(list): Names of annotations that should be returned by the pipeline. If specified, 
+            the pipeline drops each intermediate annotation as soon as no subsequent processor reads it, 
+            and returns only the requested annotations. By default, all annotations are returned.
+        cache(StageCache): If specified, results of processors are cached in this storage (see WrapperCache 
+            in isanlp.wrapper_cache). Nested pipelines are not cached as a whole, they should have their own cache.
+        hooks(list): Instrumentation hooks. Each hook is an object with methods 
+            on_stage_start(pipeline, stage, input_data) and on_stage_end(pipeline, stage, input_data, results, error), 
+            which are invoked around each processor call. Here pipeline is the path of the pipeline (its name, 
+            for nested pipelines it is the path of the enclosing stage followed by the name of the nested 
+            pipeline, e.g., main/1/en, so branches of PipelineConditional should have distinct names), stage is the name of 
+            the processor, input_data is a tuple of input annotations (a list of tuples in process_batch), 
+            error is an exception raised by the processor or None (a CancelledError for processors that are 
+            abandoned after another processor fails). Each on_stage_start is followed by on_stage_end. 
+            Nested pipelines inherit hooks of the enclosing pipeline. In the concurrent mode, hooks are invoked in the calling thread on submission and 
+            completion of processors and are not inherited by nested pipelines. See isanlp.pipeline_profiler 
+            for the built-in collector of timings.
+        async_executor(concurrent.futures.Executor): Executor for synchronous processors in the asyncio mode 
+            (see method acall). Nested pipelines (including branches of PipelineConditional) inherit it. 
+            By default, the default executor of the event loop is used.
+            
+    Compilation:
+        On construction, the pipeline is compiled into an execution plan (see method compile). Compilation 
+        checks that each input annotation of a processor is produced by one of the preceding processors 
+        (or is an input of the pipeline) and raises ValueError otherwise. If the structure of the pipeline 
+        is modified after construction (e.g., via get_processors), compile should be invoked again. 
+        The execution plan, executors and hooks are not pickled with the pipeline: a copy sent to another 
+        process (e.g., to workers of NlpService) is compiled again and runs its processors sequentially 
+        and without hooks.
+            
+    Batch processing:
+        The method process_batch processes a list of documents stage by stage. Processors can implement 
+        an optional method batch_call (or pipe) that takes a list of tuples of input annotations and returns 
+        a list of results, one per document. Such processors receive the whole batch in one call, 
+        other processors are invoked for each document separately.
+        
+    Asyncio:
+        The coroutine acall processes a document without blocking the event loop. Processors that implement 
+        a coroutine method acall (e.g., ProcessorRemote, nested pipelines) or are coroutine functions themselves 
+        are awaited natively, synchronous processors are executed in async_executor. Independent processors 
+        are awaited concurrently according to the dependency graph.
+        
+    Streaming:
+        The method stream processes an iterable of documents lazily. Each processor works in its own thread, 
+        so while processor k handles document i, processor k+1 handles document i-1. The number of 
+        documents inside the pipeline is bounded, the results are yielded in the input order.
         
     Examples:
         1.
@@ -58,34 +265,393 @@ class PipelineCommon:
                                                      ['sentences', 'postag'], {'lemma' : 'lemma'}),
                         (ProcessorSyntaxNetRemote('some_host', 8555), ['sentences'], 
                          {'morph' : 'morph', 'syn_dep_tree' : 'syn_dep_tree'})])
+                        
+        5.
+        PipelineCommon([(ProcessorRazdel(), ['text'], {'tokens' : 'tokens', 'sentences' : 'sentences'}),
+                        (ProcessorMystem(), ['tokens', 'sentences'], {'lemma' : 'lemma', 'postag' : 'postag'}),
+                        (ProcessorSpaCy('ru_core_news_lg', morphology=False, parser=False), 
+                         ['tokens', 'sentences'], {'entities' : 'entities'})],
+                       executor = ThreadPoolExecutor(max_workers = 2))
     """
     
-    def __init__(self, processors, name = 'main'):
+    def __init__(self, processors, name = 'main', executor = None, outputs = None, cache = None, hooks = None, 
+                 async_executor = None):
         self._name = name
+        self._executor = executor
+        self._async_executor = async_executor
+        self._outputs = outputs
+        self._cache = cache
+        self._hooks = list(hooks) if hooks is not None else None
         if type(processors) is dict:
             self._processors = processors
         else:
             self._processors = {str(i) : processors[i] for i in range(len(processors))}
         
+        self.compile()
+        
     def __call__(self, *input_data):            
-        result = {e : inp for (e, inp) in zip(list(self._processors.values())[0][1], input_data)}
-        
-        for proc, proc_input, proc_output in list(self._processors.values()):
-            results = proc(*[result[e] for e in proc_input])
-            if type(results) is tuple:
-                results = {i : results[i] for i in range(len(results))}
-            elif type(results) is not dict:
-                results = {0 : results}
+        result = dict(zip(self._input_names, input_data))
+        hooks, path = self._active_hooks()
+        
+        if self._executor is not None:
+            return self._call_concurrent(result, hooks, path)
+        
+        for stage in self._plan:
+            stage.run(result, hooks, path)
+        
+        return result
+    
+    async def acall(self, *input_data):
+        """Processes a document in the asyncio event loop.
+        
+        Args:
+            *input_data: input annotations of the pipeline.
             
-            result.update({ppl_label : results[proc_label] 
-                           for (proc_label, ppl_label) in proc_output.items() 
-                           if ppl_label})
+        Returns:
+            Dictionary with annotations.
+        """
+        
+        result = dict(zip(self._input_names, input_data))
+        hooks, path = self._active_hooks()
+        plan = self._plan
+        done = set()
+        submitted = set()
+        running = {}
+        committed = 0
+        
+        def submit_ready():
+            for j, stage in enumerate(plan):
+                if j not in submitted and stage.dependencies <= done:
+                    args = stage.get_args(result)
+                    running[asyncio.ensure_future(self._acall_stage(stage, args, hooks, path))] = j
+                    submitted.add(j)
+        
+        # stages, nested pipelines and wrappers inherit the executor
+        token = _async_executor_context.set(self._async_executor) if self._async_executor is not None else None
+        submit_ready()
+        try:
+            while running:
+                completed, _ = await asyncio.wait(running, return_when = asyncio.FIRST_COMPLETED)
+                for task in completed:
+                    j = running.pop(task)
+                    plan[j].store(result, task.result())
+                    plan[j].check_none(result)
+                    done.add(j)
+                
+                while committed in done:
+                    plan[committed].drop_dead(result)
+                    committed += 1
+                
+                submit_ready()
+        finally:
+            for task in running:
+                task.cancel()
             
-            keys_to_delete = [k for (k,v) in result.items() if v is None]
-            for k in keys_to_delete:
-                del result[k]
+            if token is not None:
+                _async_executor_context.reset(token)
         
         return result
+    
+    async def _acall_stage(self, stage, args, hooks, path):
+        if hooks is None:
+            return await _ainvoke(stage.proc, args)
+        
+        for hook in hooks:
+            hook.on_stage_start(path, stage.name, args)
+        
+        token = _hooks_context.set((hooks, '{}/{}'.format(path, stage.name)))
+        try:
+            results = await _ainvoke(stage.proc, args)
+        except BaseException as err:
+            # includes cancellation of the stage, when another stage of the document fails
+            for hook in hooks:
+                hook.on_stage_end(path, stage.name, args, None, err)
+            raise
+        finally:
+            _hooks_context.reset(token)
+        
+        for hook in hooks:
+            hook.on_stage_end(path, stage.name, args, results, None)
+        
+        return results
+    
+    def compile(self):
+        """Compiles the pipeline into an execution plan.
+        
+        Validates the wiring of processors, resolves input and output annotations of each processor into 
+        precomputed accessors, builds the dependency graph for the concurrent mode and finds annotations 
+        that can be dropped after each processor.
+        
+        Returns:
+            The pipeline itself.
+        
+        Raises:
+            ValueError: if an input annotation of a processor is not produced by preceding processors.
+        """
+        
+        plan = []
+        for name, proc_stuff in self._processors.items():
+            if len(proc_stuff) != 3:
+                raise ValueError('Processor "{}" of the pipeline "{}" should be specified with a tripple: '
+                                 '(<processor object>, <list of input names>, <dictionary of outputs>).'
+                                 .format(name, self._name))
+            
+            proc, proc_input, proc_output = proc_stuff
+            if not callable(proc):
+                raise ValueError('Processor "{}" of the pipeline "{}" is not callable.'.format(name, self._name))
+            
+            if self._cache is not None and not hasattr(proc, 'processors_iter'):
+                from .wrapper_cache import WrapperCache
+                proc = WrapperCache(proc, self._cache, async_executor = self._async_executor)
+            
+            plan.append(_Stage(name, proc, proc_input, proc_output))
+        
+        self._input_names = list(self._processors.values())[0][1] if plan else []
+        
+        available = set(self._input_names)
+        for stage in plan:
+            missing = [e for e in stage.reads if e not in available]
+            if missing:
+                raise ValueError('Input annotations {} of the processor "{}" are not produced '
+                                 'by preceding processors of the pipeline "{}".'
+                                 .format(missing, stage.name, self._name))
+            
+            available |= stage.writes
+        
+        self._build_dependencies(plan)
+        self._build_liveness(plan)
+        self._plan = plan
+        return self
+    
+    def process_batch(self, batch):
+        """Processes a batch of documents.
+        
+        Args:
+            batch(list): list of documents. Each document is a tuple of input annotations of the pipeline 
+                or a single input annotation if the pipeline has only one input.
+                
+        Returns:
+            List of dictionaries with annotations (one dictionary per document).
+        """
+        
+        results = [dict(zip(self._input_names, inputs if type(inputs) is tuple else (inputs,))) 
+                   for inputs in batch]
+        if not results:
+            return results
+        
+        hooks, path = self._active_hooks()
+        for stage in self._plan:
+            batch_args = [stage.get_args(result) for result in results]
+            if hooks is None:
+                batch_results = call_batch(stage.proc, batch_args)
+            else:
+                batch_results = _call_instrumented(hooks, path, stage.name, batch_args, 
+                                                   lambda: call_batch(stage.proc, batch_args))
+            
+            for result, results_doc in zip(results, batch_results):
+                stage.store(result, results_doc)
+                stage.finish(result)
+        
+        return results
+    
+    def batch_call(self, batch):
+        return self.process_batch(batch)
+    
+    def stream(self, documents, max_in_flight = 16):
+        """Processes an iterable of documents in a pipelined way.
+        
+        Args:
+            documents: iterable of documents. Each document is a tuple of input annotations of the pipeline 
+                or a single input annotation if the pipeline has only one input.
+            max_in_flight(int): maximal number of documents that are read from the iterable, 
+                but are not yet yielded.
+                
+        Yields:
+            Dictionaries with annotations in the order of the input documents. If a processor raises 
+            an exception, it is reraised when the corresponding document is reached.
+        """
+        
+        plan = self._plan
+        hooks, path = self._active_hooks()
+        queues = [queue.Queue() for _ in range(len(plan) + 1)]
+        slots = threading.Semaphore(max_in_flight)
+        stop = threading.Event()
+        end = object()
+        
+        def feed():
+            try:
+                for inputs in documents:
+                    while not slots.acquire(timeout = 0.1):
+                        if stop.is_set():
+                            return
+                    
+                    if stop.is_set():
+                        return
+                    
+                    queues[0].put((dict(zip(self._input_names, inputs if type(inputs) is tuple else (inputs,))), 
+                                   None))
+            except Exception as err:
+                queues[0].put((None, err))
+            finally:
+                queues[0].put(end)
+        
+        def work(k):
+            while True:
+                item = queues[k].get()
+                if item is end:
+                    queues[k + 1].put(end)
+                    return
+                
+                result, error = item
+                if error is None and not stop.is_set():
+                    try:
+                        plan[k].run(result, hooks, path)
+                    except Exception as err:
+                        error = err
+                
+                queues[k + 1].put((result, error))
+        
+        threads = [threading.Thread(target = feed, daemon = True)]
+        threads += [threading.Thread(target = work, args = (k,), daemon = True) for k in range(len(plan))]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is end:
+                    return
+                
+                result, error = item
+                slots.release()
+                if error is not None:
+                    raise error
+                
+                yield result
+        finally:
+            stop.set()
+    
+    def _build_dependencies(self, plan):
+        """Builds the dependency graph of processors.
+        
+        Processor j depends on the preceding processor i if j reads an annotation that i writes, 
+        or j writes an annotation that i reads or writes.
+        """
+        
+        for j in range(len(plan)):
+            plan[j].dependencies = {i for i in range(j) 
+                                    if (plan[j].reads & plan[i].writes) 
+                                    or (plan[j].writes & plan[i].reads) 
+                                    or (plan[j].writes & plan[i].writes)}
+    
+    def _build_liveness(self, plan):
+        """Finds annotations that can be checked for None or dropped after each processor.
+        
+        Only annotations written by a processor (and the pipeline inputs for the first one) can become None. 
+        If outputs of the pipeline are specified, an annotation is dropped after the processor that 
+        reads or writes it last, unless it is requested in outputs.
+        """
+        
+        for stage in plan:
+            stage.none_checks = list(stage.writes)
+            stage.drops = []
+        
+        if plan:
+            plan[0].none_checks += [e for e in self._input_names if e not in plan[0].writes]
+        
+        if self._outputs is not None:
+            last_use = {}
+            for i, stage in enumerate(plan):
+                for k in stage.reads | stage.writes:
+                    last_use[k] = i
+            
+            for k, i in last_use.items():
+                if k not in self._outputs:
+                    plan[i].drops.append(k)
+    
+    def _active_hooks(self):
+        inherited = _hooks_context.get()
+        if inherited is None:
+            if self._hooks is None:
+                return None, None
+            
+            return self._hooks, self._name
+        
+        hooks, path = inherited
+        if self._hooks is not None:
+            hooks = hooks + [hook for hook in self._hooks if hook not in hooks]
+        
+        return hooks, '{}/{}'.format(path, self._name)
+    
+    def _call_concurrent(self, result, hooks = None, path = None):
+        plan = self._plan
+        done = set()
+        submitted = set()
+        running = {}
+        committed = 0
+        
+        def submit_ready():
+            for j, stage in enumerate(plan):
+                if j not in submitted and stage.dependencies <= done:
+                    args = stage.get_args(result)
+                    if hooks is not None:
+                        for hook in hooks:
+                            hook.on_stage_start(path, stage.name, args)
+                    
+                    running[self._executor.submit(stage.proc, *args)] = (j, args)
+                    submitted.add(j)
+        
+        submit_ready()
+        try:
+            while running:
+                completed, _ = futures.wait(running, return_when = futures.FIRST_COMPLETED)
+                for future in completed:
+                    j, args = running.pop(future)
+                    error = future.exception()
+                    if hooks is not None:
+                        for hook in hooks:
+                            hook.on_stage_end(path, plan[j].name, args, None if error else future.result(), error)
+                    
+                    if error is not None:
+                        raise error
+                    
+                    plan[j].store(result, future.result())
+                    plan[j].check_none(result)
+                    done.add(j)
+                
+                # annotations are dropped in the declaration order, 
+                # since a preceding independent processor can still read them
+                while committed in done:
+                    plan[committed].drop_dead(result)
+                    committed += 1
+                
+                submit_ready()
+        finally:
+            # processors that are still running when another one fails are abandoned,
+            # hooks are notified, so each on_stage_start is matched by on_stage_end
+            for future, (j, args) in running.items():
+                future.cancel()
+                if hooks is not None:
+                    for hook in hooks:
+                        hook.on_stage_end(path, plan[j].name, args, None, futures.CancelledError())
+        
+        return result
+
+    def __getstate__(self):
+        # the execution plan contains closures, which can not be pickled, it is compiled again on unpickling;
+        # executors and hooks (e.g., ProfileCollector with its lock) usually can not be pickled either and 
+        # belong to the process where the pipeline was constructed
+        state = self.__dict__.copy()
+        state.pop('_plan', None)
+        state.pop('_input_names', None)
+        state['_executor'] = None
+        state['_async_executor'] = None
+        state['_hooks'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.compile()
 
     def get_processors(self):
         return self._processors
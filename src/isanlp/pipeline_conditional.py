@@ -1,5 +1,8 @@
 import itertools
 
+from .pipeline_common import call_batch, _ainvoke
+
+
 class PipelineConditional:
     def __init__(self, condition, ppl_dict, default_ppl = None):
         self._condition = condition
@@ -7,14 +10,51 @@ class PipelineConditional:
         self._default = default_ppl
     
     def __call__(self, *args):
-        cond_res = self._condition(*args)
+        return self._select(self._condition(*args))(*args)
+    
+    def batch_call(self, batch):
+        """Processes a batch of documents.
+        
+        The condition is evaluated for each document (in one call if the condition supports batches), 
+        then documents are grouped by the selected pipelines, and each group is passed to the batch path 
+        of its pipeline in one call. Results are returned in the input order.
+        
+        Args:
+            batch(list): list of tuples of input annotations (one tuple per document).
+            
+        Returns:
+            List of results (one per document).
+        """
+        
+        batch = [args if type(args) is tuple else (args,) for args in batch]
+        cond_results = call_batch(self._condition, batch)
         
+        groups = {}
+        for i, cond_res in enumerate(cond_results):
+            ppl = self._select(cond_res)
+            groups.setdefault(id(ppl), (ppl, []))[1].append(i)
+        
+        results = [None] * len(batch)
+        for ppl, indexes in groups.values():
+            for i, res in zip(indexes, call_batch(ppl, [batch[i] for i in indexes])):
+                results[i] = res
+        
+        return results
+    
+    def process_batch(self, batch):
+        return self.batch_call(batch)
+    
+    async def acall(self, *args):
+        # synchronous branches run in the async_executor of the enclosing pipeline, like its processors
+        return await _ainvoke(self._select(self._condition(*args)), args)
+    
+    def _select(self, cond_res):
         for key, ppl in self._ppl_dict.items():
             if cond_res == key:
-                return ppl(*args)
+                return ppl
         
         if self._default is not None:
-            return self._default(*args)
+            return self._default
         
         raise RuntimeError('No such option: {}.'.format(cond_res))
 
@@ -0,0 +1,157 @@
+import bisect
+import difflib
+import re
+
+from . import annotation as ann
+from .pipeline_common import call_batch
+
+import logging
+logger = logging.getLogger('isanlp')
+
+
+_PARAGRAPH = re.compile(r'[^\n]+')
+
+
+def _paragraphs(text):
+    return [(m.start(), m.end()) for m in _PARAGRAPH.finditer(text)]
+
+
+class PipelineIncremental:
+    """Re-annotates edited documents reusing annotations of unchanged sentences.
+
+    The new text is compared with the text of the previous annotation paragraph by paragraph (paragraphs are
+    separated by line breaks). Sentences of the previous annotation that lie entirely in unchanged paragraphs
+    are reused: their tokens are shifted to the new offsets, their sentence-level annotations are copied.
+    The remaining fragments of the new text are processed by the pipeline (in one batch) and spliced
+    with the reused sentences, so tokens and sentences of the result are indexed as if the whole
+    document was processed.
+
+    Only tokens, sentences, and sentence-level annotations are present in the result. Sentence-level
+    annotations are lists with an item per sentence that do not refer to tokens outside the sentence
+    (lemma, postag, morph, syntax_dep_tree). Document-level annotations (e.g., entities, rst) should be
+    recomputed on the result. Items of sentence-level annotations are shared with the previous annotation.
+
+    Args:
+        ppl: pipeline that takes text and returns a dictionary with tokens, sentences, and sentence-level annotations.
+        sentence_annotations(list): names of sentence-level annotations that should be spliced.
+
+    Example:
+        ppl = PipelineIncremental(PipelineCommon([(ProcessorRazdel(), ['text'],
+                                                   {'tokens' : 'tokens', 'sentences' : 'sentences'}),
+                                                  (ProcessorUDPipe('russian.udpipe'), ['tokens', 'sentences'],
+                                                   {'lemma' : 'lemma', 'syntax_dep_tree' : 'syntax_dep_tree'})]),
+                                  sentence_annotations = ['lemma', 'syntax_dep_tree'])
+        annotation = ppl(text)
+        annotation = ppl.update(annotation, edited_text)
+    """
+
+    def __init__(self, ppl, sentence_annotations = ('lemma', 'postag', 'morph', 'syntax_dep_tree')):
+        self._ppl = ppl
+        self._sentence_annotations = list(sentence_annotations)
+
+    def __call__(self, text):
+        """Annotates the whole text."""
+
+        return self._splice(text, [], [(0, len(text))])
+
+    def update(self, prev_annotation, text):
+        """Re-annotates the edited text.
+
+        Args:
+            prev_annotation(dict): previous annotation that contains text, tokens, sentences,
+                and sentence-level annotations.
+            text(str): new text of the document.
+
+        Returns:
+            Dictionary with text, tokens, sentences, and sentence-level annotations.
+        """
+
+        if 'text' not in prev_annotation:
+            raise ValueError('The previous annotation should contain the source text.')
+
+        reused = self._find_unchanged_sentences(prev_annotation, text)
+
+        regions = []
+        cursor = 0
+        for _, new_tokens in reused:
+            if new_tokens[0].begin > cursor:
+                regions.append((cursor, new_tokens[0].begin))
+            cursor = new_tokens[-1].end
+        regions.append((cursor, len(text)))
+
+        logger.debug('Incremental annotation: {} of {} sentences are reused.'
+                     .format(len(reused), len(prev_annotation['sentences'])))
+
+        return self._splice(text, [(prev_annotation, sent_num, new_tokens) for sent_num, new_tokens in reused],
+                            regions)
+
+    def _find_unchanged_sentences(self, prev_annotation, text):
+        old_text = prev_annotation['text']
+        old_tokens = prev_annotation['tokens']
+        old_pars = _paragraphs(old_text)
+        new_pars = _paragraphs(text)
+        old_begins = [begin for begin, _ in old_pars]
+
+        matcher = difflib.SequenceMatcher(None,
+                                          [old_text[begin : end] for begin, end in old_pars],
+                                          [text[begin : end] for begin, end in new_pars],
+                                          autojunk = False)
+
+        # old paragraph -> (offset shift, number of the block of equal paragraphs)
+        par_map = {}
+        for block_num, (tag, i1, i2, j1, j2) in enumerate(matcher.get_opcodes()):
+            if tag == 'equal':
+                for k in range(i2 - i1):
+                    par_map[i1 + k] = (new_pars[j1 + k][0] - old_pars[i1 + k][0], block_num)
+
+        reused = []
+        for sent_num, sent in enumerate(prev_annotation['sentences']):
+            tokens = old_tokens[sent.begin : sent.end]
+            if not tokens:
+                continue
+
+            mapping = []
+            for token in tokens:
+                par_num = bisect.bisect_right(old_begins, token.begin) - 1
+                if par_num < 0 or token.end > old_pars[par_num][1] or par_num not in par_map:
+                    break
+                mapping.append(par_map[par_num])
+
+            # a sentence is reused only if it lies in one block of unchanged paragraphs
+            if len(mapping) < len(tokens) or len(set(block for _, block in mapping)) > 1:
+                continue
+
+            reused.append((sent_num, [ann.Token(token.text, token.begin + shift, token.end + shift)
+                                      for token, (shift, _) in zip(tokens, mapping)]))
+
+        return reused
+
+    def _splice(self, text, reused, regions):
+        non_empty = [(begin, end) for begin, end in regions if text[begin : end].strip()]
+        processed = dict(zip(non_empty, call_batch(self._ppl, [(text[begin : end],) for begin, end in non_empty])))
+
+        pieces = [(begin, 'new', (begin, end)) for begin, end in non_empty]
+        pieces += [(new_tokens[0].begin, 'old', (prev, sent_num, new_tokens)) for prev, sent_num, new_tokens in reused]
+        pieces.sort(key = lambda e: e[0])
+
+        tokens = []
+        sentences = []
+        result = {name : [] for name in self._sentence_annotations}
+        for _, kind, piece in pieces:
+            if kind == 'old':
+                prev, sent_num, new_tokens = piece
+                sentences.append(ann.Sentence(len(tokens), len(tokens) + len(new_tokens)))
+                tokens += new_tokens
+                for name in self._sentence_annotations:
+                    result[name].append(prev[name][sent_num])
+            else:
+                begin, _ = piece
+                res = processed[piece]
+                offset = len(tokens)
+                tokens += [ann.Token(token.text, token.begin + begin, token.end + begin) for token in res['tokens']]
+                sentences += [ann.Sentence(sent.begin + offset, sent.end + offset) for sent in res['sentences']]
+                for name in self._sentence_annotations:
+                    result[name] += res[name]
+
+        result.update({'text' : text, 'tokens' : tokens, 'sentences' : sentences})
+        return result
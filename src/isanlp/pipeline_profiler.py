@@ -0,0 +1,179 @@
+"""Built-in instrumentation hook for PipelineCommon that collects timings of processors."""
+
+import collections
+import threading
+import time
+
+from . import annotation as ann
+
+
+def annotation_size(data):
+    """Counts tokens and sentences in annotations.
+
+    Args:
+        data: tuple of input annotations, dictionary/tuple of processor results, or a single annotation.
+
+    Returns:
+        Tuple (number of tokens, number of sentences).
+    """
+
+    if type(data) is dict:
+        values = data.values()
+    elif type(data) is tuple:
+        values = data
+    else:
+        values = (data,)
+
+    n_tokens = 0
+    n_sentences = 0
+    for value in values:
+        if type(value) is list and value:
+            if isinstance(value[0], ann.Token):
+                n_tokens += len(value)
+            elif isinstance(value[0], ann.Sentence):
+                n_sentences += len(value)
+
+    return n_tokens, n_sentences
+
+
+def _batch_size(data, is_batch):
+    sizes = [annotation_size(e) for e in data] if is_batch else [annotation_size(data)]
+    return sum(e[0] for e in sizes), sum(e[1] for e in sizes)
+
+
+def percentile(values, q):
+    """Computes percentile q (0-100) of values using the nearest-rank method."""
+
+    if not values:
+        return None
+
+    values = sorted(values)
+    rank = max(int(round(q / 100. * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class ProfileCollector:
+    """Collects wall time, CPU time, input and output sizes of processors.
+
+    The collector is an instrumentation hook of PipelineCommon. Measurements are grouped by the path of
+    a pipeline and the name of a stage, so processors of nested pipelines are reported separately.
+    CPU time is measured for the thread that invokes a processor (in the concurrent and asyncio modes of
+    PipelineCommon it is the calling thread, so CPU time is not meaningful there).
+
+    Args:
+        max_samples(int): maximal number of recent measurements stored for each stage.
+
+    Example:
+        profiler = ProfileCollector()
+        ppl = PipelineCommon([...], hooks = [profiler])
+        for text in texts:
+            ppl(text)
+
+        print(profiler.format_report())
+    """
+
+    FIELDS = ('wall_time', 'cpu_time', 'input_tokens', 'input_sentences', 'output_tokens', 'output_sentences')
+
+    def __init__(self, max_samples = 10000):
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._samples = collections.OrderedDict()
+        self._errors = collections.Counter()
+
+    def on_stage_start(self, pipeline, stage, input_data):
+        # several documents can be processed by the same stage in one thread (e.g., in asyncio mode)
+        starts = self._starts()
+        starts[(pipeline, stage, id(input_data))] = (time.perf_counter(), time.thread_time())
+
+    def on_stage_end(self, pipeline, stage, input_data, results, error):
+        start = self._starts().pop((pipeline, stage, id(input_data)), None)
+        if start is None:
+            return
+
+        wall_time = time.perf_counter() - start[0]
+        cpu_time = time.thread_time() - start[1]
+        key = (pipeline, stage)
+        if error is not None:
+            with self._lock:
+                self._errors[key] += 1
+            return
+
+        # input data of batches are lists of tuples
+        is_batch = type(input_data) is list
+        input_tokens, input_sentences = _batch_size(input_data, is_batch)
+        output_tokens, output_sentences = _batch_size(results, is_batch)
+
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = collections.deque(maxlen = self._max_samples)
+
+            self._samples[key].append((wall_time, cpu_time,
+                                       input_tokens, input_sentences,
+                                       output_tokens, output_sentences))
+
+    def report(self, percentiles = (50, 90, 99)):
+        """Aggregates measurements.
+
+        Args:
+            percentiles(tuple): percentiles to compute.
+
+        Returns:
+            Dictionary {(<pipeline path>, <stage name>) : <statistics>}. Statistics is a dictionary that
+            contains the number of calls ('count'), the number of failed calls ('errors'), and for each of
+            wall_time, cpu_time (seconds), input_tokens, input_sentences, output_tokens, output_sentences
+            a dictionary with 'mean', 'total' and requested percentiles ('p50', 'p90', ...).
+        """
+
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+            errors = dict(self._errors)
+
+        result = collections.OrderedDict()
+        for key in list(samples.keys()) + [e for e in errors if e not in samples]:
+            values = samples.get(key, [])
+            stats = {'count': len(values), 'errors': errors.get(key, 0)}
+            for i, field in enumerate(self.FIELDS):
+                column = [e[i] for e in values]
+                field_stats = {'mean': sum(column) / len(column) if column else None,
+                               'total': sum(column)}
+                for q in percentiles:
+                    field_stats['p{}'.format(q)] = percentile(column, q)
+
+                stats[field] = field_stats
+
+            result[key] = stats
+
+        return result
+
+    def format_report(self, percentiles = (50, 90, 99)):
+        """Formats aggregated wall and CPU times as a text table (times are in milliseconds)."""
+
+        header = ['pipeline', 'stage', 'count', 'errors', 'wall total']
+        header += ['wall p{}'.format(q) for q in percentiles]
+        header += ['cpu total', 'tokens in', 'tokens out']
+        rows = [header]
+
+        for (pipeline, stage), stats in self.report(percentiles).items():
+            row = [pipeline, stage, str(stats['count']), str(stats['errors']),
+                   '{:.1f}'.format(stats['wall_time']['total'] * 1000.)]
+            row += ['{:.1f}'.format(stats['wall_time']['p{}'.format(q)] * 1000.)
+                    if stats['count'] else '-' for q in percentiles]
+            row += ['{:.1f}'.format(stats['cpu_time']['total'] * 1000.),
+                    str(stats['input_tokens']['total']),
+                    str(stats['output_tokens']['total'])]
+            rows.append(row)
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._errors.clear()
+
+    def _starts(self):
+        if not hasattr(self._local, 'starts'):
+            self._local.starts = {}
+
+        return self._local.starts
@@ -54,8 +54,36 @@ class ProcessorDeeppavlovSyntax:
 
         return self.process_tokenized(argv[0], argv[1])
 
+    def batch_call(self, batch):
+        """Performs tagging, lemmatizing and parsing of several documents in one model call.
+        Args:
+            batch(list): List of tuples (tokens, sentences).
+        Returns:
+            List of dictionaries (one per document) with the same annotations as __call__.
+        """
+        assert self.model
+        if any(type(argv[0]) == str for argv in batch):
+            raise Exception('ProcessorDeeppavlovSyntax does not perform sentence splitting!')
+
+        model_input = []
+        for tokens, sentences in batch:
+            model_input += self.prepare_tokenized_input(tokens, sentences)
+
+        predictions = self.model(model_input) if model_input else []
+
+        result = []
+        offset = 0
+        for tokens, sentences in batch:
+            result.append(self.convert_predictions(predictions[offset: offset + len(sentences)]))
+            offset += len(sentences)
+
+        return result
+
     def process_tokenized(self, tokens, sentences):
         predictions = self.model(self.prepare_tokenized_input(tokens, sentences))
+        return self.convert_predictions(predictions)
+
+    def convert_predictions(self, predictions):
         annotation = self.converter_conll('\n\n'.join(predictions))
         lemma_result = annotation['lemma']
         postag_result = annotation['postag']
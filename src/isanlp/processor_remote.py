@@ -2,61 +2,519 @@ from . import annotation_pb2
 from . import annotation_pb2_grpc
 from . import annotation_to_protobuf
 from . import annotation_from_protobuf
+from .request_context import PRIORITY_METADATA_KEY, time_remaining
+from .nlp_service_metrics import stats_from_protobuf
+from .grpc_options import compression_algorithm, make_options
 
+import asyncio
+import collections
+import itertools
+import threading
+import time
+from concurrent import futures
 import grpc
+import grpc.aio
 from google.protobuf.any_pb2 import Any
 import copy
 
 
+# status codes that indicate a problem with the endpoint rather than with the request
+_ENDPOINT_FAILURES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+
+class _Endpoint:
+    """Server address with a pool of channels and load statistics."""
+
+    def __init__(self, address, n_channels, options, compression):
+        self.address = address
+        self.options = options
+        self.compression = compression
+        self.channels = [grpc.insecure_channel(address, options = options, compression = compression)
+                         for _ in range(n_channels)]
+        self.stubs = [annotation_pb2_grpc.NlpServiceStub(channel) for channel in self.channels]
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.
+        self._next_stub = itertools.cycle(self.stubs)
+        # grpc.aio channels are bound to the event loop they are created in: {<loop> : (<channel>, <stub>)},
+        # loops are referenced until their channels are closed
+        self._aio_channels = {}
+
+    def stub(self):
+        return next(self._next_stub)
+
+    def get_aio_stub(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._aio_channels:
+            # channels of closed loops can not be used anymore
+            for old_loop, (channel, _) in list(self._aio_channels.items()):
+                if old_loop.is_closed():
+                    del self._aio_channels[old_loop]
+                    loop.create_task(channel.close())
+
+            channel = grpc.aio.insecure_channel(self.address, options = self.options, compression = self.compression)
+            self._aio_channels[loop] = (channel, annotation_pb2_grpc.NlpServiceStub(channel))
+
+        return self._aio_channels[loop][1]
+
+    async def aclose(self):
+        item = self._aio_channels.pop(asyncio.get_running_loop(), None)
+        if item is not None:
+            await item[0].close()
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+
+class _Balancer:
+    """Selects endpoints for requests and ejects endpoints that fail repeatedly.
+
+    Args:
+        endpoints(list): list of _Endpoint objects.
+        policy(str): 'round_robin' or 'least_outstanding'.
+        max_failures(int): number of consecutive failures after which the endpoint is ejected.
+        ejection_time(float): time in seconds the ejected endpoint does not receive requests.
+    """
+
+    def __init__(self, endpoints, policy, max_failures, ejection_time):
+        if policy not in ('round_robin', 'least_outstanding'):
+            raise ValueError('Unknown balancing policy: {}'.format(policy))
+
+        self.endpoints = endpoints
+        self._policy = policy
+        self._max_failures = max_failures
+        self._ejection_time = ejection_time
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude=None):
+        """Selects an endpoint and counts the request as outstanding."""
+
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e is not exclude]
+            # if all endpoints are ejected, requests are still sent to them
+            candidates = [e for e in candidates if e.ejected_until <= now] or candidates or self.endpoints
+
+            self._counter += 1
+            start = self._counter % len(candidates)
+            candidates = candidates[start:] + candidates[:start]
+            if self._policy == 'least_outstanding':
+                endpoint = min(candidates, key=lambda e: e.outstanding)
+            else:
+                endpoint = candidates[0]
+
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint, code=None):
+        """Marks the request as completed with status code (None if succeeded)."""
+
+        with self._lock:
+            endpoint.outstanding -= 1
+            if code not in _ENDPOINT_FAILURES:
+                endpoint.failures = 0
+                return
+
+            endpoint.failures += 1
+            if endpoint.failures >= self._max_failures:
+                endpoint.ejected_until = time.monotonic() + self._ejection_time
+                endpoint.failures = 0
+
+
+def _parse_address(address):
+    if type(address) is tuple:
+        return '{}:{}'.format(*address)
+
+    return address
+
+
 class ProcessorRemote:
     """Calls remote pipeline using gRPC.
-    
+
+    Requests can be spread over several identical servers (endpoints). An endpoint is selected for
+    each request by the balancing policy. An endpoint that fails repeatedly (the server is unavailable
+    or does not reply in time) is ejected for a while.
+
     Args:
         host(str): hostname of the gRPC server.
         port(int): port of the gRPC server.
         pipeline_name(str): name of the registered pipeline (or processor) to invoke.
+        priority(str): priority of requests in the queues of the service ('interactive' or 'bulk'),
+            the default priority of the service is used if None.
+        endpoints(list): addresses of servers ('host:port' strings or (host, port) tuples) used instead of
+            host and port.
+        channels_per_endpoint(int): number of gRPC channels (connections) opened to each endpoint.
+        balancing(str): 'round_robin' or 'least_outstanding' (the endpoint with the minimal number of
+            uncompleted requests is selected).
+        max_failures(int): number of consecutive failures after which the endpoint is ejected.
+        ejection_time(float): time in seconds the ejected endpoint does not receive requests.
+        hedge_delay(float): if a request (process or batch) is not completed in hedge_delay seconds,
+            the same request is sent to another endpoint, and the first received reply is used.
+            Hedging is disabled if None.
+        compression(str): compression of requests: None, 'gzip', or 'deflate'. Methods submit, map,
+            batch_call, and process_stream can override it for a call.
+        max_send_message_length(int): maximal size of requests in bytes (-1 for no limit).
+        max_receive_message_length(int): maximal size of replies in bytes (-1 for no limit, the gRPC
+            default is 4 MB, which is not enough for long documents with full annotations).
+        keepalive_time(float): interval in seconds between keepalive pings of idle connections.
+        keepalive_timeout(float): time in seconds to wait for the ping acknowledgement.
+        channel_options(list): additional options of gRPC channels [(<name>, <value>), ...].
+
+    If the processor is called by a pipeline of NlpService, the time remaining until the deadline of
+    the served request is used as the deadline of the call.
+
+    Example:
+        ProcessorRemote(None, None, 'default', endpoints = ['nlp1:3333', 'nlp2:3333'],
+                        balancing = 'least_outstanding', hedge_delay = 0.5)
     """
-    
-    def __init__(self, host, port, pipeline_name):
+
+    def __init__(self, host, port, pipeline_name, priority = None, endpoints = None,
+                 channels_per_endpoint = 1, balancing = 'round_robin', max_failures = 3,
+                 ejection_time = 30., hedge_delay = None, compression = None,
+                 max_send_message_length = None, max_receive_message_length = None,
+                 keepalive_time = None, keepalive_timeout = None, channel_options = None):
         self._host = host
         self._port = port
         self._pipeline_name = pipeline_name
-        self._channel = grpc.insecure_channel('{}:{}'.format(self._host, self._port))
-        self._stub = annotation_pb2_grpc.NlpServiceStub(self._channel)
-    
+        self._metadata = ((PRIORITY_METADATA_KEY, priority),) if priority is not None else None
+        self._addresses = ([_parse_address(e) for e in endpoints] if endpoints
+                           else ['{}:{}'.format(self._host, self._port)])
+        self._channels_per_endpoint = channels_per_endpoint
+        self._balancing = balancing
+        self._max_failures = max_failures
+        self._ejection_time = ejection_time
+        self._hedge_delay = hedge_delay
+        self._compression = compression
+        self._channel_options = make_options(max_send_message_length = max_send_message_length,
+                                             max_receive_message_length = max_receive_message_length,
+                                             keepalive_time = keepalive_time,
+                                             keepalive_timeout = keepalive_timeout,
+                                             options = channel_options)
+        self._connect()
+
     def __call__(self, *input_data):
         """ Calls remote pipeline via gRPC.
-        
+
+        Args:
+            *input_data: the input data for the remote pipeline.
+
+        Returns:
+            Result of the remote pipeline.
+        """
+
+        response = self._unary_future('process', self._make_request(input_data)).result()
+        return annotation_from_protobuf.convert_annotation(response.output_annotations)
+
+    def batch_call(self, batch, compression = None):
+        """ Processes a batch of documents with one gRPC call.
+
+        Args:
+            batch(list): list of tuples of input data for the remote pipeline (one tuple per document).
+            compression(str): compression of the request (the compression of the processor by default).
+
+        Returns:
+            List of results of the remote pipeline.
+        """
+
+        request = annotation_pb2.ProcessBatchRequest(pipeline_name = self._pipeline_name)
+        for input_data in batch:
+            request.input_annotations.add().Pack(annotation_to_protobuf.convert_annotation(tuple(input_data)))
+
+        response = self._unary_future('process_batch', request, compression).result()
+        return [annotation_from_protobuf.convert_annotation(e) for e in response.output_annotations]
+
+    def process_stream(self, documents, max_in_flight = 32, compression = None):
+        """ Processes many documents over one streaming gRPC call.
+
+        Args:
+            documents: iterable of documents. Each document is a tuple of input data for the remote
+                pipeline or a single input (e.g., text).
+            max_in_flight(int): maximal number of documents sent to the server, but not yet returned.
+            compression(str): compression of requests (the compression of the processor by default).
+
+        Yields:
+            Results of the remote pipeline in the order of documents.
+        """
+
+        window = threading.Semaphore(max_in_flight)
+        finished = threading.Event()
+
+        def requests():
+            for num, inputs in enumerate(documents):
+                while not window.acquire(timeout = 1.):
+                    if finished.is_set():
+                        return
+
+                request = self._make_request(inputs if type(inputs) is tuple else (inputs,))
+                request.request_id = str(num)
+                yield request
+
+        endpoint = self._balancer.acquire()
+        code = None
+        call = endpoint.stub().process_stream(requests(), metadata = self._metadata, timeout = time_remaining(),
+                                              compression = _call_compression(compression))
+        try:
+            next_num = 0
+            replies = {}
+            for reply in call:
+                window.release()
+                replies[reply.request_id] = reply
+                while str(next_num) in replies:
+                    reply = replies.pop(str(next_num))
+                    next_num += 1
+                    yield annotation_from_protobuf.convert_annotation(reply.output_annotations)
+        except grpc.RpcError as err:
+            code = err.code()
+            raise
+        finally:
+            finished.set()
+            call.cancel()
+            self._balancer.release(endpoint, code)
+
+    def submit(self, *input_data, compression = None):
+        """ Sends a request to the remote pipeline without waiting for the reply.
+
         Args:
             *input_data: the input data for the remote pipeline.
-        
+            compression(str): compression of the request (the compression of the processor by default).
+
+        Returns:
+            concurrent.futures.Future with the result of the remote pipeline. Cancelling the future
+            cancels the gRPC call.
+        """
+
+        result = futures.Future()
+        reply = self._unary_future('process', self._make_request(input_data), compression)
+
+        def convert(future):
+            if future.cancelled():
+                result.cancel()
+                return
+
+            try:
+                if future.exception() is not None:
+                    result.set_exception(future.exception())
+                else:
+                    result.set_result(annotation_from_protobuf.convert_annotation(future.result().output_annotations))
+            except futures.InvalidStateError:
+                pass
+            except Exception as err:
+                result.set_exception(err)
+
+        reply.add_done_callback(convert)
+        result.add_done_callback(lambda f: reply.cancel() if f.cancelled() else None)
+        return result
+
+    def map(self, documents, max_in_flight = 16, compression = None):
+        """ Processes documents keeping up to max_in_flight requests outstanding.
+
+        Unlike process_stream, documents are sent in separate unary calls, so they can be processed
+        by different endpoints.
+
+        Args:
+            documents: iterable of documents. Each document is a tuple of input data for the remote
+                pipeline or a single input (e.g., text).
+            max_in_flight(int): maximal number of requests sent, but not yet returned.
+            compression(str): compression of requests (the compression of the processor by default).
+
+        Yields:
+            Results of the remote pipeline in the order of documents.
+        """
+
+        pending = collections.deque()
+        try:
+            for inputs in documents:
+                pending.append(self.submit(*(inputs if type(inputs) is tuple else (inputs,)),
+                                           compression = compression))
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def acall(self, *input_data):
+        """ Calls remote pipeline via asyncio gRPC (grpc.aio) without blocking the event loop.
+
+        Args:
+            *input_data: the input data for the remote pipeline.
+
         Returns:
             Result of the remote pipeline.
         """
-        
+
+        request = self._make_request(input_data)
+        endpoint = self._balancer.acquire()
+        first = self._aio_invoke(endpoint, request)
+        if self._hedge_delay is None or len(self._balancer.endpoints) < 2:
+            response = await first
+        else:
+            response = await self._ahedge(endpoint, first, request)
+
+        return annotation_from_protobuf.convert_annotation(response.output_annotations)
+
+    async def aclose(self):
+        """ Closes asyncio channels of the processor bound to the running event loop.
+
+        Channels of other loops are closed automatically after their loops are closed.
+        """
+
+        for endpoint in self._balancer.endpoints:
+            await endpoint.aclose()
+
+    def get_stats(self):
+        """ Requests metrics of the remote service.
+
+        Returns:
+            Dictionary {<pipeline name> : <metrics>} (see ServiceMetrics.snapshot).
+        """
+
+        endpoint = self._balancer.acquire()
+        try:
+            response = endpoint.stub().get_stats(annotation_pb2.Void())
+        finally:
+            self._balancer.release(endpoint)
+
+        return stats_from_protobuf(response)
+
+    def _unary_future(self, method, request, compression = None):
+        """Sends a unary request to the selected endpoint (with optional hedging).
+
+        Returns:
+            concurrent.futures.Future with the reply message.
+        """
+
+        result = futures.Future()
+        lock = threading.Lock()
+        calls = []
+        # hedged attempts are started in another thread, so the inherited deadline is captured here
+        remaining = time_remaining()
+        deadline = time.time() + remaining if remaining is not None else None
+
+        def on_done(call):
+            with lock:
+                pending = [c for c in calls if not c.done()]
+                if result.done() or (call.exception() is not None and pending):
+                    # another attempt can still succeed
+                    return
+
+                try:
+                    if call.exception() is not None:
+                        result.set_exception(call.exception())
+                    else:
+                        result.set_result(call.result())
+                except futures.InvalidStateError:
+                    # the result is cancelled by the caller
+                    pass
+
+            for other in pending:
+                other.cancel()
+
+        def on_result_done(future):
+            if future.cancelled():
+                with lock:
+                    pending = list(calls)
+                for call in pending:
+                    call.cancel()
+
+        def start(exclude = None):
+            endpoint = self._balancer.acquire(exclude)
+            with lock:
+                timeout = max(deadline - time.time(), 0.) if deadline is not None else None
+                call = self._invoke(endpoint, method, request, compression, timeout)
+                calls.append(call)
+            call.add_done_callback(on_done)
+            return endpoint
+
+        def hedge():
+            if not result.done():
+                start(exclude = first_endpoint)
+
+        first_endpoint = start()
+        result.add_done_callback(on_result_done)
+        if self._hedge_delay is not None and len(self._balancer.endpoints) > 1:
+            timer = threading.Timer(self._hedge_delay, hedge)
+            timer.daemon = True
+            timer.start()
+            result.add_done_callback(lambda f: timer.cancel())
+
+        return result
+
+    def _invoke(self, endpoint, method, request, compression = None, timeout = None):
+        call = getattr(endpoint.stub(), method).future(request, metadata = self._metadata, timeout = timeout,
+                                                       compression = _call_compression(compression))
+        call.add_done_callback(lambda c: self._balancer.release(endpoint, _status_code(c, timeout)))
+        return call
+
+    def _aio_invoke(self, endpoint, request):
+        timeout = time_remaining()
+        task = asyncio.ensure_future(endpoint.get_aio_stub().process(request, metadata = self._metadata,
+                                                                     timeout = timeout))
+        task.add_done_callback(lambda t: self._balancer.release(endpoint, _status_code(t, timeout)))
+        return task
+
+    async def _ahedge(self, endpoint, first, request):
+        done, _ = await asyncio.wait({first}, timeout = self._hedge_delay)
+        if done:
+            return first.result()
+
+        second = self._aio_invoke(self._balancer.acquire(exclude = endpoint), request)
+        pending = {first, second}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    return succeeded[0].result()
+                if not pending:
+                    return done.pop().result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _make_request(self, input_data):
         pb_ann = Any()
         pb_ann.Pack(annotation_to_protobuf.convert_annotation(input_data))
-        request = annotation_pb2.ProcessRequest(pipeline_name = self._pipeline_name, 
-                                                input_annotations = pb_ann)
-        
-        response = self._stub.process(request)
-        return annotation_from_protobuf.convert_annotation(response.output_annotations)
-    
+        return annotation_pb2.ProcessRequest(pipeline_name = self._pipeline_name,
+                                             input_annotations = pb_ann)
+
+    def _connect(self):
+        endpoints = [_Endpoint(address, self._channels_per_endpoint, self._channel_options,
+                               compression_algorithm(self._compression))
+                     for address in self._addresses]
+        self._balancer = _Balancer(endpoints, self._balancing, self._max_failures, self._ejection_time)
+
     def __getstate__(self):
-        # capture what is normally pickled
-        #state = copy.deepcopy(self.__dict__)
+        # channels can not be pickled, they are re-created on unpickling
         state = self.__dict__.copy()
-        # replace the `value` key (now an EnumValue instance), with it's index:
-        del state['_channel']
-        # what we return here will be stored in the pickle
-        del state['_stub']
+        del state['_balancer']
         return state
-    
+
     def __setstate__(self, newstate):
-        # re-create the EnumState instance based on the stored index
-        #newstate['_channel'] = grpc.insecure_channel('{}:{}'.format(newstate['_host'], newstate['_port']))
-        self._channel = grpc.insecure_channel('{}:{}'.format(newstate['_host'], newstate['_port']))
-        #newstate['_stub'] = annotation_pb2_grpc.NlpServiceStub(newstate['_channel'])
-        self._stub = annotation_pb2_grpc.NlpServiceStub(self._channel)
-        # re-instate our __dict__ state from the pickled state
         self.__dict__.update(newstate)
+        self._connect()
+
+
+def _call_compression(compression):
+    # None means the compression of the channel
+    return compression_algorithm(compression) if compression is not None else None
+
+
+def _status_code(call, timeout = None):
+    if call.cancelled():
+        return grpc.StatusCode.CANCELLED
+
+    err = call.exception()
+    if err is None:
+        return None
+
+    code = err.code() if hasattr(err, 'code') else grpc.StatusCode.UNKNOWN
+    if code == grpc.StatusCode.DEADLINE_EXCEEDED and timeout is not None:
+        # the deadline is inherited from the served request, its expiration is not a failure of the endpoint
+        return grpc.StatusCode.CANCELLED
+
+    return code
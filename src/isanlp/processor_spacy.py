@@ -80,26 +80,38 @@ class ProcessorSpaCy:
         """
         assert self.model
 
+        spacy_doc = self.model(self._prepare_input(*argv))
+        return self._dictionarize(spacy_doc)
+
+    def batch_call(self, batch, batch_size=None):
+        """Processes a batch of documents with spaCy's nlp.pipe.
+        Args:
+            batch(list): List of tuples (text,) OR (tokens, sentences).
+            batch_size(int): spaCy batch size, the default of the model is used if None.
+        Returns:
+            List of dictionaries (one per document) with the same annotations as __call__.
+        """
+        assert self.model
+
+        spacy_docs = self.model.pipe((self._prepare_input(*argv) for argv in batch), batch_size=batch_size)
+        return [self._dictionarize(spacy_doc) for spacy_doc in spacy_docs]
+
+    def _prepare_input(self, *argv):
         if type(argv[0]) == str:
             # Run with tokenization
-            text = argv[0]
-            spacy_doc = self.model(text)
+            return argv[0]
 
-        else:
-            # Run on pre-tokenized text
-            tokens, sentences = argv[0], argv[1]
+        # Run on pre-tokenized text
+        tokens, sentences = argv[0], argv[1]
 
-            words = [tok.text for tok in tokens]
-            sent_starts = []
-            for sentence in sentences:
-                sent_starts += [True] + [False] * (sentence.end - sentence.begin - 1)
+        words = [tok.text for tok in tokens]
+        sent_starts = []
+        for sentence in sentences:
+            sent_starts += [True] + [False] * (sentence.end - sentence.begin - 1)
 
-            assert len(words) == len(sent_starts)
+        assert len(words) == len(sent_starts)
 
-            spacy_doc = spacy.tokens.Doc(self.model.vocab, words=words, sent_starts=sent_starts)
-            spacy_doc = self.model(spacy_doc)
-
-        return self._dictionarize(spacy_doc)
+        return spacy.tokens.Doc(self.model.vocab, words=words, sent_starts=sent_starts)
 
     def _dictionarize(self, doc, tokenization=True):
         def features_as_dict(features):
@@ -0,0 +1,42 @@
+import functools
+import importlib
+
+
+class ProcessorSpec:
+    """Declaration of a processor (or a pipeline) that is built by a factory where it is used.
+
+    Only the spec (the module, the name of the factory, and its arguments) is pickled into worker processes,
+    workers import the module and build their own objects. So models are not pickled, and processors
+    that do not survive fork (e.g., based on PyTorch) can be used in pools with the 'spawn' start method.
+
+    Args:
+        module(str): name of the module, e.g., 'isanlp.processor_udpipe'.
+        factory(str): name of a class or a function of the module (can be dotted for nested attributes).
+        args(tuple): positional arguments of the factory.
+        kwargs(dict): keyword arguments of the factory.
+
+    Example:
+        ProcessorSpec('isanlp.processor_udpipe', 'ProcessorUDPipe', kwargs = {'model_path' : 'russian.udpipe'})
+    """
+
+    def __init__(self, module, factory, args = (), kwargs = None):
+        self.module = module
+        self.factory = factory
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+
+    def build(self):
+        """Imports the factory and invokes it with the arguments of the spec."""
+
+        factory = functools.reduce(getattr, self.factory.split('.'), importlib.import_module(self.module))
+        return factory(*self.args, **self.kwargs)
+
+    def __repr__(self):
+        args = [repr(e) for e in self.args] + ['{}={!r}'.format(k, v) for k, v in sorted(self.kwargs.items())]
+        return 'ProcessorSpec({}.{}({}))'.format(self.module, self.factory, ', '.join(args))
+
+
+def build_processor(proc):
+    """Builds the processor if it is declared by ProcessorSpec, otherwise returns it as is."""
+
+    return proc.build() if isinstance(proc, ProcessorSpec) else proc
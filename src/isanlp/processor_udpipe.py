@@ -62,6 +62,49 @@ class ProcessorUDPipe:
         self.pipeline = Pipeline(self.model, self.TOKENIZER, self.tagger, self.parser, 'conllu')
         return self.process_tokenized(argv[0], argv[1])
 
+    def batch_call(self, batch):
+        """Processes a batch of documents.
+
+        Pre-tokenized documents are joined and passed to UDPipe in a single call, the results are split back
+        by the number of sentences in each document. Sentences without tokens (and documents without sentences)
+        are not passed to UDPipe, they get empty annotations.
+        Args:
+            batch(list): List of tuples (text,) OR (tokens, sentences).
+        Returns:
+            List of dictionaries (one per document) with the same annotations as __call__.
+        """
+        assert self.model
+        if any(type(argv[0]) == str for argv in batch):
+            return [self(*argv) for argv in batch]
+
+        self.TOKENIZER = 'horizontal'
+        self.pipeline = Pipeline(self.model, self.TOKENIZER, self.tagger, self.parser, 'conllu')
+
+        keys = (['lemma', 'postag', 'morph'] if self._enable_tagger else [])
+        keys += ['syntax_dep_tree'] if self._enable_parser else []
+        lines = [[' '.join(e.text for e in CSentence(tokens, sent)) for sent in sentences]
+                 for tokens, sentences in batch]
+        raw_input = ''.join(line + '\n' for doc_lines in lines for line in doc_lines if line)
+        if raw_input:
+            annotation = self.process_text(raw_input)
+            if annotation is None or len(annotation['form']) != raw_input.count('\n'):
+                return [self.process_tokenized(tokens, sentences) for tokens, sentences in batch]
+
+        result = []
+        offset = 0
+        for doc_lines in lines:
+            doc_result = {key: [] for key in keys}
+            for line in doc_lines:
+                for key in keys:
+                    doc_result[key].append(annotation[key][offset] if line else [])
+
+                if line:
+                    offset += 1
+
+            result.append(doc_result)
+
+        return result
+
     def process_text(self, text):
         udpipe_result = self.pipeline.process(text, self.error)
         if self.error.occurred():
@@ -0,0 +1,36 @@
+"""Request properties shared by NlpService and its clients: priorities and deadlines."""
+
+import contextlib
+import contextvars
+import time
+
+
+PRIORITY_METADATA_KEY = 'isanlp-priority'
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+
+
+# deadline (time.time() based) of the request processed in the current context
+_DEADLINE = contextvars.ContextVar('isanlp_deadline', default=None)
+
+
+def time_remaining():
+    """Returns the time in seconds remaining until the deadline of the request processed by the current
+    worker of NlpService, or None if the request has no deadline.
+
+    ProcessorRemote uses it as the timeout of nested calls, so they do not outlive the request.
+    """
+
+    deadline = _DEADLINE.get()
+    return max(deadline - time.time(), 0.) if deadline is not None else None
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline):
+    """Sets the deadline (time.time() based, None for no deadline) of the request processed within the block."""
+
+    token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
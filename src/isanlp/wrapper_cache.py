@@ -0,0 +1,302 @@
+import collections
+import hashlib
+import inspect
+import pickle
+import sqlite3
+import threading
+
+from .pipeline_common import call_batch, _ainvoke
+
+
+_PICKLE_PROTOCOL = 4
+_SIMPLE_TYPES = (str, int, float, bool, type(None))
+_CONTAINER_TYPES = (list, tuple, dict, set, frozenset)
+_TAGS = {type(None) : 'n', bool : 'b', int : 'i', float : 'f', str : 's', bytes : 'y', list : 'l', tuple : 't'}
+
+
+def _encode(obj, out):
+    """Appends a canonical serialization of the object to the list of byte strings.
+
+    Unlike pickle, the serialization depends only on values, not on identities of objects, and
+    does not depend on the order of items of dictionaries and sets. Objects of other classes are
+    serialized as their qualified class name and attributes.
+    """
+
+    tp = type(obj)
+    if obj is None or tp is bool or tp is int or tp is float:
+        data = repr(obj).encode('ascii')
+        out.append('{}{}:'.format(_TAGS[tp], len(data)).encode('ascii'))
+        out.append(data)
+    elif tp is str or tp is bytes:
+        data = obj.encode('utf8') if tp is str else obj
+        out.append('{}{}:'.format(_TAGS[tp], len(data)).encode('ascii'))
+        out.append(data)
+    elif tp is list or tp is tuple:
+        out.append('{}{}:'.format(_TAGS[tp], len(obj)).encode('ascii'))
+        for item in obj:
+            _encode(item, out)
+    elif tp is dict:
+        out.append('d{}:'.format(len(obj)).encode('ascii'))
+        for key, value in sorted((_canonical(k), v) for k, v in obj.items()):
+            out.append(key)
+            _encode(value, out)
+    elif tp is set or tp is frozenset:
+        out.append('e{}:'.format(len(obj)).encode('ascii'))
+        out.extend(sorted(_canonical(item) for item in obj))
+    elif hasattr(obj, '__dict__'):
+        out.append('o{}.{}:'.format(tp.__module__, tp.__qualname__).encode('utf8'))
+        _encode(vars(obj), out)
+    else:
+        out.append('p:'.encode('ascii'))
+        out.append(pickle.dumps(obj, protocol = _PICKLE_PROTOCOL))
+
+
+def _canonical(obj):
+    out = []
+    _encode(obj, out)
+    return b''.join(out)
+
+
+def _is_plain_data(value):
+    if type(value) in _SIMPLE_TYPES:
+        return True
+
+    if type(value) is dict:
+        return all(_is_plain_data(k) and _is_plain_data(v) for k, v in value.items())
+
+    if type(value) in _CONTAINER_TYPES:
+        return all(_is_plain_data(e) for e in value)
+
+    return False
+
+
+def _constructor_params(tp):
+    try:
+        params = inspect.signature(tp.__init__).parameters.values()
+    except (TypeError, ValueError):
+        return set()
+
+    return {e.name for e in params if e.kind not in (e.VAR_POSITIONAL, e.VAR_KEYWORD)} - {'self'}
+
+
+def fingerprint(proc):
+    """Computes identity/configuration fingerprint of a processor.
+
+    If the processor implements method fingerprint, its result is used. If it has attribute (or method)
+    cache_key, the fingerprint is the qualified name of its class and the cache key. Otherwise, the fingerprint
+    consists of the qualified name of the processor class (or function) and its constructor configuration:
+    attributes named after parameters of the constructor (optionally with leading underscores, e.g.,
+    self._model_path for parameter model_path) that hold plain data: strings, numbers, booleans,
+    and lists, tuples, dictionaries, and sets of them. Other attributes (models, connections, counters,
+    lazily loaded resources) are ignored, so the fingerprint does not change while the processor works.
+    Processors that store their configuration under other names or in objects should define cache_key.
+
+    Args:
+        proc: processor object, function or bound method.
+
+    Returns:
+        String fingerprint.
+    """
+
+    if hasattr(proc, 'fingerprint'):
+        return str(proc.fingerprint())
+
+    owner = getattr(proc, '__self__', None)
+    if owner is not None:
+        return '{}.{}'.format(fingerprint(owner), proc.__name__)
+
+    tp = proc if hasattr(proc, '__qualname__') else type(proc)
+    result = '{}.{}'.format(getattr(tp, '__module__', None) or '', tp.__qualname__)
+
+    code = getattr(proc, '__code__', None)
+    if code is not None:
+        # distinguishes lambdas and redefined functions
+        result += ':{}:{}'.format(code.co_firstlineno, hashlib.sha256(code.co_code).hexdigest()[:16])
+
+    if tp is not type(proc):
+        return result
+
+    if hasattr(proc, 'cache_key'):
+        cache_key = proc.cache_key() if callable(proc.cache_key) else proc.cache_key
+        return '{}:{}'.format(result, cache_key)
+
+    params = _constructor_params(tp)
+    config = {k : v for k, v in vars(proc).items() if k.lstrip('_') in params and _is_plain_data(v)} \
+        if hasattr(proc, '__dict__') else {}
+    if config:
+        result += ':' + hashlib.sha256(_canonical(config)).hexdigest()[:16]
+
+    return result
+
+
+class StageCache:
+    """Content-addressed cache of processor results.
+
+    Results are stored in pickled form, so cache hits always return fresh copies of annotations
+    that can be safely modified by subsequent processors.
+
+    Args:
+        max_size(int): maximal number of results in the in-memory LRU tier.
+        path(str): path to the sqlite database file of the optional on-disk tier. The on-disk tier
+            is not limited in size, results evicted from memory are still available on disk.
+    """
+
+    def __init__(self, max_size = 1024, path = None):
+        self._max_size = max_size
+        self._path = path
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, proc_fingerprint, input_data):
+        """Makes a stable key from a processor fingerprint and its input annotations.
+
+        The key is a hash of a canonical serialization of annotations, so equal annotations have equal keys
+        in all processes.
+        """
+
+        hsh = hashlib.sha256(proc_fingerprint.encode('utf8'))
+        hsh.update(_canonical(tuple(input_data)))
+        return hsh.hexdigest()
+
+    def get(self, key):
+        """Returns tuple (found, result)."""
+
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            elif self._path is not None:
+                row = self._get_db().execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    value = row[0]
+                    self._put_memory(key, value)
+
+            if value is None:
+                self.misses += 1
+                return False, None
+
+            self.hits += 1
+
+        return True, pickle.loads(value)
+
+    def put(self, key, result):
+        value = pickle.dumps(result, protocol = _PICKLE_PROTOCOL)
+        with self._lock:
+            self._put_memory(key, value)
+            if self._path is not None:
+                db = self._get_db()
+                db.execute('INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)', (key, value))
+                db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._path is not None:
+                db = self._get_db()
+                db.execute('DELETE FROM cache')
+                db.commit()
+
+    def _put_memory(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_size:
+            self._memory.popitem(last = False)
+
+    def _get_db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self._path, check_same_thread = False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB)')
+            self._db.commit()
+
+        return self._db
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        del state['_db']
+        return state
+
+    def __setstate__(self, newstate):
+        self.__dict__.update(newstate)
+        self._lock = threading.Lock()
+        self._db = None
+
+
+class WrapperCache:
+    """Caches results of a processor in a StageCache.
+
+    The cache key is a stable hash of the input annotations of the processor combined with
+    the processor fingerprint (see function fingerprint). The wrapper supports batches:
+    only documents that are not found in the cache are passed to the processor. In the asyncio mode
+    (acall), asynchronous processors are awaited natively, synchronous processors are executed in
+    async_executor.
+
+    Args:
+        proc: processor object.
+        cache(StageCache): cache storage. The same storage can be shared between several wrappers.
+        proc_fingerprint(str): fingerprint of the processor, computed automatically if not specified.
+            It should be changed when the processor configuration or model is changed.
+        async_executor(concurrent.futures.Executor): executor for the synchronous processor in acall,
+            the async_executor of the enclosing pipeline (or the default executor of the event loop) is used if None.
+
+    Example:
+        cache = StageCache(max_size = 10000, path = 'annotations.sqlite')
+        PipelineCommon([(WrapperCache(ProcessorRazdel(), cache), ['text'],
+                         {'tokens' : 'tokens', 'sentences' : 'sentences'}),
+                        (WrapperCache(ProcessorMystem(), cache), ['tokens', 'sentences'],
+                         {'lemma' : 'lemma', 'postag' : 'postag'})])
+    """
+
+    def __init__(self, proc, cache, proc_fingerprint = None, async_executor = None):
+        self._proc = proc
+        self._cache = cache
+        self._async_executor = async_executor
+        self._fingerprint = proc_fingerprint if proc_fingerprint is not None else fingerprint(proc)
+
+    def __call__(self, *input_data):
+        key = self._cache.make_key(self._fingerprint, input_data)
+        found, result = self._cache.get(key)
+        if not found:
+            result = self._proc(*input_data)
+            self._cache.put(key, result)
+
+        return result
+
+    async def acall(self, *input_data):
+        key = self._cache.make_key(self._fingerprint, input_data)
+        found, result = self._cache.get(key)
+        if found:
+            return result
+
+        result = await _ainvoke(self._proc, input_data, self._async_executor)
+        self._cache.put(key, result)
+        return result
+
+    def batch_call(self, batch):
+        keys = [self._cache.make_key(self._fingerprint, input_data) for input_data in batch]
+        results = []
+        missed = []
+        for i, key in enumerate(keys):
+            found, result = self._cache.get(key)
+            results.append(result)
+            if not found:
+                missed.append(i)
+
+        if missed:
+            for i, result in zip(missed, call_batch(self._proc, [batch[i] for i in missed])):
+                self._cache.put(keys[i], result)
+                results[i] = result
+
+        return results
+
+    def fingerprint(self):
+        return self._fingerprint
+
+    def processors_iter(self):
+        if hasattr(self._proc, 'processors_iter'):
+            yield from self._proc.processors_iter()
+        else:
+            yield self._proc
@@ -1,9 +1,28 @@
-from multiprocessing import current_process, Pool
+from multiprocessing import current_process, get_context
 import math
 import tqdm
 
+from .processor_spec import ProcessorSpec
+
+
+_built_procs = {}
+def _get_processor(proc):
+    # processors declared by specs are built and initialized once per worker
+    if not isinstance(proc, ProcessorSpec):
+        return proc
+    
+    key = repr(proc)
+    if key not in _built_procs:
+        built = proc.build()
+        if hasattr(built, 'init'):
+            built.init()
+        _built_procs[key] = built
+    
+    return _built_procs[key]
+
 
 def _process_chunk(chunk, proc):
+    proc = _get_processor(proc)
     result = []
     for doc_num, doc in enumerate(chunk):
         result.append(proc(doc))
@@ -38,7 +57,7 @@ def split_equally(lst, nparts):
 global_proc = None
 def _initialize(processors):
     global global_proc
-    global_proc = processors[current_process()._identity[0] % len(processors)]
+    global_proc = _get_processor(processors[current_process()._identity[0] % len(processors)])
 
     
 def _perform_analysis(arg):
@@ -50,11 +69,13 @@ class WrapperMultiProcessDocument:
                  processors, 
                  ptype='balanced', 
                  chunksize=10,
-                 progress_bar=tqdm.tqdm):
+                 progress_bar=tqdm.tqdm,
+                 start_method=None):
         """
         Args:
-            processors(list): 
+            processors(list): processor objects or ProcessorSpec objects (built and initialized in workers)
             ptype(str): balanced, even
+            start_method(str): start method of worker processes: fork, spawn, forkserver (platform default if None)
         """
         
         self._processors = processors
@@ -62,12 +83,13 @@ class WrapperMultiProcessDocument:
         self._chunksize = chunksize
         self._progress_bar = progress_bar
         
+        mp_context = get_context(start_method)
         if self._ptype == 'balanced':
-            self._pool = Pool(len(self._processors), 
-                              initializer = _initialize, 
-                              initargs = (self._processors,))
+            self._pool = mp_context.Pool(len(self._processors), 
+                                         initializer = _initialize, 
+                                         initargs = (self._processors,))
         elif self._ptype == 'even':
-            self._pool = Pool(len(self._processors))
+            self._pool = mp_context.Pool(len(self._processors))
         else:
             raise ValueError()
         
@@ -0,0 +1,24 @@
+import socket
+import threading
+
+import grpc
+import pytest
+
+from isanlp.nlp_service_server import NlpServiceServer
+
+
+@pytest.fixture
+def start_server():
+    """Starts NlpServiceServer without worker processes in a daemon thread and returns its port."""
+
+    def start(ppls, **kwargs):
+        with socket.socket() as sock:
+            sock.bind(('localhost', 0))
+            port = sock.getsockname()[1]
+
+        server = NlpServiceServer(ppls, port = port, no_multiprocessing = True, **kwargs)
+        threading.Thread(target = server.serve, daemon = True).start()
+        grpc.channel_ready_future(grpc.insecure_channel('localhost:{}'.format(port))).result(timeout = 10)
+        return port
+
+    return start
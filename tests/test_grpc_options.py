@@ -0,0 +1,33 @@
+import grpc
+import pytest
+
+from isanlp.grpc_options import compression_algorithm, make_options
+
+
+def test_compression_algorithm():
+    assert compression_algorithm(None) == grpc.Compression.NoCompression
+    assert compression_algorithm('gzip') == grpc.Compression.Gzip
+    assert compression_algorithm(grpc.Compression.Deflate) == grpc.Compression.Deflate
+    with pytest.raises(ValueError):
+        compression_algorithm('zstd')
+
+
+def test_options_occur_once():
+    options = make_options(max_receive_message_length = -1, keepalive_time = 30, keepalive_timeout = 10,
+                           min_ping_interval = 20)
+    names = [name for name, _ in options]
+    assert len(names) == len(set(names))
+    assert dict(options) == {'grpc.max_receive_message_length' : -1,
+                             'grpc.keepalive_time_ms' : 30000,
+                             'grpc.keepalive_permit_without_calls' : 1,
+                             'grpc.http2.max_pings_without_data' : 0,
+                             'grpc.keepalive_timeout_ms' : 10000,
+                             'grpc.http2.min_ping_interval_without_data_ms' : 20000}
+
+
+def test_raw_options_override_generated_ones():
+    options = make_options(keepalive_time = 30,
+                           options = [('grpc.keepalive_time_ms', 5000), ('grpc.lb_policy_name', 'pick_first')])
+    assert dict(options)['grpc.keepalive_time_ms'] == 5000
+    assert [name for name, _ in options].count('grpc.keepalive_time_ms') == 1
+    assert ('grpc.lb_policy_name', 'pick_first') in options
@@ -0,0 +1,139 @@
+import time
+from concurrent import futures
+
+import pytest
+
+from isanlp.nlp_service import QueueFullError, _MicroBatcher, _PipelineQueue, _run_timed
+from isanlp.request_context import deadline_scope, time_remaining
+
+
+class BatchRecorder:
+    def __init__(self, error = None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, documents, priority, deadline):
+        self.batches.append((documents, priority, deadline))
+        result = futures.Future()
+        if self.error is not None:
+            result.set_exception(self.error)
+        else:
+            result.set_result([document.upper() for document in documents])
+
+        return result
+
+
+def test_micro_batcher_coalesces_documents():
+    run = BatchRecorder()
+    batcher = _MicroBatcher(run, max_size = 3, max_wait = 0.2)
+    submitted = [batcher.submit(document) for document in ['a', 'b', 'c', 'd']]
+    assert [future.result(timeout = 5) for future in submitted[:3]] == ['A', 'B', 'C']
+    # the last document waits for other documents at most max_wait seconds
+    assert submitted[3].result(timeout = 5) == 'D'
+    assert [documents for documents, _, _ in run.batches] == [['a', 'b', 'c'], ['d']]
+
+
+def test_micro_batcher_closes_batch_after_max_wait():
+    run = BatchRecorder()
+    batcher = _MicroBatcher(run, max_size = 100, max_wait = 0.05)
+    start = time.monotonic()
+    assert batcher.submit('a').result(timeout = 5) == 'A'
+    assert time.monotonic() - start < 1.
+
+
+def test_micro_batcher_distributes_errors():
+    batcher = _MicroBatcher(BatchRecorder(error = RuntimeError('broken pipeline')), max_size = 2, max_wait = 1.)
+    submitted = [batcher.submit(document) for document in ['a', 'b']]
+    for future in submitted:
+        with pytest.raises(RuntimeError, match = 'broken pipeline'):
+            future.result(timeout = 5)
+
+
+def test_micro_batcher_skips_cancelled_documents():
+    run = BatchRecorder()
+    batcher = _MicroBatcher(run, max_size = 3, max_wait = 0.2)
+    cancelled = batcher.submit('a')
+    assert cancelled.cancel()
+    assert batcher.submit('b').result(timeout = 5) == 'B'
+    assert [documents for documents, _, _ in run.batches] == [['b']]
+
+
+def test_micro_batcher_merges_priorities_and_deadlines():
+    run = BatchRecorder()
+    batcher = _MicroBatcher(run, max_size = 2, max_wait = 1.)
+    submitted = [batcher.submit('a', 'bulk', 10.), batcher.submit('b', 'interactive', 20.)]
+    futures.wait(submitted, timeout = 5)
+    assert run.batches == [(['a', 'b'], 'interactive', 20.)]
+
+
+class Starter:
+    def __init__(self):
+        self.started = []
+        self.running = {}
+
+    def __call__(self, label):
+        def start():
+            self.started.append(label)
+            self.running[label] = futures.Future()
+            return self.running[label]
+
+        return start
+
+    def finish(self, label):
+        self.running.pop(label).set_result(label)
+
+
+def test_pipeline_queue_starts_interactive_requests_first():
+    starter = Starter()
+    pipeline_queue = _PipelineQueue(limit = 1)
+    submitted = [pipeline_queue.submit(starter('first'))]
+    submitted += [pipeline_queue.submit(starter(label), 'bulk') for label in ['b0', 'b1']]
+    submitted += [pipeline_queue.submit(starter(label)) for label in ['i0', 'i1']]
+    assert starter.started == ['first'] and pipeline_queue.queue_size() == 4
+
+    for label in ['first', 'i0', 'i1', 'b0', 'b1']:
+        starter.finish(label)
+
+    assert starter.started == ['first', 'i0', 'i1', 'b0', 'b1']
+    assert [future.result(timeout = 5) for future in submitted] == ['first', 'b0', 'b1', 'i0', 'i1']
+
+
+def test_pipeline_queue_rejects_requests_when_lane_is_full():
+    starter = Starter()
+    pipeline_queue = _PipelineQueue(limit = 1, max_queue_size = 1)
+    pipeline_queue.submit(starter('first'))
+    pipeline_queue.submit(starter('b0'), 'bulk')
+    with pytest.raises(QueueFullError):
+        pipeline_queue.submit(starter('b1'), 'bulk').result(timeout = 5)
+
+    # the other lane has its own limit
+    pipeline_queue.submit(starter('i0'))
+    assert pipeline_queue.queue_size() == 2
+
+
+def test_pipeline_queue_skips_cancelled_requests():
+    starter = Starter()
+    pipeline_queue = _PipelineQueue(limit = 1)
+    pipeline_queue.submit(starter('first'))
+    assert pipeline_queue.submit(starter('cancelled')).cancel()
+    waiting = pipeline_queue.submit(starter('next'))
+    starter.finish('first')
+    starter.finish('next')
+    assert starter.started == ['first', 'next'] and waiting.result(timeout = 5) == 'next'
+
+
+def test_time_remaining_follows_deadline_of_request():
+    assert time_remaining() is None
+    with deadline_scope(time.time() + 5.):
+        assert 4. < time_remaining() <= 5.
+        with deadline_scope(time.time() - 1.):
+            assert time_remaining() == 0.
+
+    assert time_remaining() is None
+
+
+def test_run_timed_exposes_deadline_to_pipeline():
+    started, duration, remaining = _run_timed(time.time() + 5., time_remaining)
+    assert 4. < remaining <= 5. and duration >= 0. and started <= time.time()
+    assert _run_timed(None, time_remaining)[2] is None
+    assert time_remaining() is None
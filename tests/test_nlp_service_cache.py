@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from isanlp import annotation as ann
+from isanlp.nlp_service_cache import ReplyCache
+from isanlp.pipeline_common import PipelineCommon
+from isanlp.processor_remote import ProcessorRemote
+
+
+def test_reply_cache_evicts_least_recently_used_replies():
+    cache = ReplyCache(max_size = 2)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    assert cache.get('a') == b'1'
+    cache.put('c', b'3')
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (b'1', None, b'3')
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_reply_cache_limits_total_size():
+    cache = ReplyCache(max_bytes = 5)
+    cache.put('a', b'12')
+    cache.put('b', b'345')
+    cache.put('c', b'6')
+    assert len(cache) == 2 and cache.get('a') is None
+    cache.put('d', b'123456')
+    assert cache.get('d') is None and len(cache) == 2
+
+
+def test_reply_cache_expires_replies():
+    cache = ReplyCache(ttl = 0.05)
+    cache.put('a', b'1')
+    assert cache.get('a') == b'1'
+    time.sleep(0.1)
+    assert cache.get('a') is None and len(cache) == 0
+
+
+def test_reply_cache_keys_depend_on_pipeline():
+    cache = ReplyCache()
+    assert cache.make_key('main', b'text') == cache.make_key('main', b'text')
+    assert cache.make_key('main', b'text') != cache.make_key('other', b'text')
+
+
+@pytest.mark.parametrize('use_asyncio, convert_in_workers', [(False, False), (True, False), (False, True)])
+def test_service_answers_repeated_documents_from_cache(start_server, use_asyncio, convert_in_workers):
+    processed = []
+
+    def tokenize(text):
+        processed.append(text)
+        return [ann.Token(w, 0, len(w)) for w in text.split()]
+
+    port = start_server({'main' : PipelineCommon([(tokenize, ['text'], {0 : 'tokens'})])},
+                        reply_cache = ReplyCache(), use_asyncio = use_asyncio,
+                        convert_in_workers = convert_in_workers)
+    remote = ProcessorRemote('localhost', port, 'main')
+    assert [e.text for e in remote('a b')['tokens']] == ['a', 'b']
+    assert [e.text for e in remote('a b')['tokens']] == ['a', 'b']
+
+    # cached replies keep request ids of the stream, so results stay in order
+    remote('c')
+    texts = ['c', 'a b', 'c', 'd e f']
+    assert [len(e['tokens']) for e in remote.process_stream(texts)] == [1, 2, 1, 3]
+    assert sorted(processed) == ['a b', 'c', 'd e f']
+    assert remote.get_stats()['main']['cache_hits'] == 4
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import grpc
+import pytest
+
+from isanlp import annotation as ann
+from isanlp.pipeline_common import PipelineCommon
+from isanlp.processor_remote import ProcessorRemote
+from isanlp.request_context import deadline_scope, time_remaining
+
+
+def tokenize(text):
+    return [ann.Token(w, 0, len(w)) for w in text.split()]
+
+
+def slow_tokenize(text):
+    time.sleep(0.5)
+    return tokenize(text)
+
+
+def call_in_background(remote, text, n_calls):
+    threads = [threading.Thread(target = remote, args = (text,), daemon = True) for _ in range(n_calls)]
+    for thread in threads:
+        thread.start()
+
+    return threads
+
+
+@pytest.mark.parametrize('use_asyncio', [False, True])
+def test_saturated_pipeline_does_not_block_other_pipelines(start_server, use_asyncio):
+    port = start_server({'main' : PipelineCommon([(tokenize, ['text'], {0 : 'tokens'})]),
+                         'slow' : PipelineCommon([(slow_tokenize, ['text'], {0 : 'tokens'})])},
+                        max_workers = 2, pipeline_concurrency = {'slow' : 1}, use_asyncio = use_asyncio)
+    main = ProcessorRemote('localhost', port, 'main')
+    main('warm up')
+
+    threads = call_in_background(ProcessorRemote('localhost', port, 'slow'), 'a b', 4)
+    time.sleep(0.1)
+    start = time.time()
+    assert len(main('a b c')['tokens']) == 3
+    assert time.time() - start < 0.3
+
+    for thread in threads:
+        thread.join()
+
+
+@pytest.mark.parametrize('use_asyncio', [False, True])
+def test_interactive_requests_overtake_queued_bulk_requests(start_server, use_asyncio):
+    processed = []
+
+    def record(text):
+        time.sleep(0.2)
+        processed.append(text)
+        return tokenize(text)
+
+    port = start_server({'main' : PipelineCommon([(record, ['text'], {0 : 'tokens'})])},
+                        max_workers = 1, pipeline_concurrency = {'main' : 1}, use_asyncio = use_asyncio)
+    bulk = ProcessorRemote('localhost', port, 'main', priority = 'bulk')
+    interactive = ProcessorRemote('localhost', port, 'main')
+    interactive('warm up')
+    del processed[:]
+
+    threads = call_in_background(interactive, 'first', 1)
+    for remote, label in [(bulk, 'b0'), (bulk, 'b1'), (bulk, 'b2'), (interactive, 'i0'), (interactive, 'i1')]:
+        time.sleep(0.02)
+        threads += call_in_background(remote, label, 1)
+
+    for thread in threads:
+        thread.join()
+
+    assert processed == ['first', 'i0', 'i1', 'b0', 'b1', 'b2']
+
+
+@pytest.mark.parametrize('use_asyncio', [False, True])
+def test_expired_requests_are_not_processed(start_server, use_asyncio):
+    processed = []
+
+    def record(text):
+        time.sleep(0.3)
+        processed.append(text)
+        return tokenize(text)
+
+    port = start_server({'main' : PipelineCommon([(record, ['text'], {0 : 'tokens'})])},
+                        max_workers = 1, pipeline_concurrency = {'main' : 1}, use_asyncio = use_asyncio)
+    remote = ProcessorRemote('localhost', port, 'main')
+    threads = call_in_background(remote, 'first', 1)
+    time.sleep(0.05)
+    with deadline_scope(time.time() + 0.1):
+        with pytest.raises(grpc.RpcError) as err:
+            remote('expired')
+
+    assert err.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+    for thread in threads:
+        thread.join()
+
+    remote('last')
+    assert processed == ['first', 'last']
+
+
+def test_deadline_is_forwarded_to_nested_calls(start_server):
+    def budget(text):
+        return [ann.Token(str(time_remaining()), 0, 1)]
+
+    ports = []
+
+    def nested(text):
+        return ProcessorRemote('localhost', ports[0], 'budget')(text)['tokens']
+
+    ports.append(start_server({'budget' : PipelineCommon([(budget, ['text'], {0 : 'tokens'})]),
+                               'nested' : PipelineCommon([(nested, ['text'], {0 : 'tokens'})])},
+                              max_workers = 2))
+
+    remote = ProcessorRemote('localhost', ports[0], 'nested')
+    assert remote('a')['tokens'][0].text == 'None'
+    with deadline_scope(time.time() + 5.):
+        # gRPC rounds timeouts up, so the forwarded budget can slightly exceed the original one
+        assert 3. < float(remote('a')['tokens'][0].text) < 5.1
@@ -0,0 +1,260 @@
+import asyncio
+import pickle
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from isanlp.pipeline_common import PipelineCommon
+
+
+def tokenize(text):
+    return text.split()
+
+
+def count(tokens):
+    return len(tokens)
+
+
+def make_pipeline():
+    return PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                           (count, ['tokens'], {0 : 'n_tokens'})],
+                          outputs = ['n_tokens'])
+
+
+def test_concurrent_runs_independent_stages_together():
+    barrier = threading.Barrier(2, timeout = 5)
+
+    def left(text):
+        barrier.wait()
+        return 'left:' + text
+
+    def right(text):
+        barrier.wait()
+        return 'right:' + text
+
+    with ThreadPoolExecutor(max_workers = 2) as executor:
+        ppl = PipelineCommon([(left, ['text'], {0 : 'left'}),
+                              (right, ['text'], {0 : 'right'}),
+                              (lambda l, r : l + '|' + r, ['left', 'right'], {0 : 'joined'})],
+                             executor = executor)
+        assert ppl('a') == {'text' : 'a', 'left' : 'left:a', 'right' : 'right:a', 'joined' : 'left:a|right:a'}
+
+
+def test_concurrent_keeps_declaration_order_of_dependent_stages():
+    order = []
+
+    def stage(label, delay):
+        def run(value):
+            time.sleep(delay)
+            order.append(label)
+            return value + label
+
+        return run
+
+    # 'b' reads what 'a' writes, 'c' overwrites what 'b' reads, 'd' is independent of all of them
+    processors = [(stage('a', 0.05), ['text'], {0 : 'x'}),
+                  (stage('b', 0.05), ['x'], {0 : 'y'}),
+                  (stage('c', 0.), ['text'], {0 : 'x'}),
+                  (stage('d', 0.), ['text'], {0 : 'z'})]
+    expected = PipelineCommon(processors)('_')
+    del order[:]
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        assert PipelineCommon(processors, executor = executor)('_') == expected
+
+    assert order.index('a') < order.index('b') < order.index('c')
+    assert order.index('d') < order.index('b')
+
+
+def test_concurrent_reraises_errors_of_processors():
+    def fail(text):
+        raise RuntimeError('broken processor')
+
+    with ThreadPoolExecutor(max_workers = 2) as executor:
+        ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                              (fail, ['text'], {0 : 'other'})],
+                             executor = executor)
+        with pytest.raises(RuntimeError, match = 'broken processor'):
+            ppl('a b')
+
+
+class BatchCounter:
+    def __init__(self, drop_last = False):
+        self.drop_last = drop_last
+        self.batches = []
+
+    def __call__(self, tokens):
+        return len(tokens)
+
+    def batch_call(self, batch):
+        self.batches.append(len(batch))
+        results = [len(tokens) for tokens, in batch]
+        return results[:-1] if self.drop_last else results
+
+
+def test_process_batch_uses_batch_methods():
+    counter = BatchCounter()
+    ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                          (counter, ['tokens'], {0 : 'n_tokens'})],
+                         outputs = ['n_tokens'])
+    assert ppl.process_batch(['a', 'b c', '']) == [{'n_tokens' : 1}, {'n_tokens' : 2}, {'n_tokens' : 0}]
+    assert ppl.batch_call([('a b c',)]) == [{'n_tokens' : 3}]
+    assert counter.batches == [3, 1]
+    assert ppl.process_batch([]) == []
+
+
+def test_process_batch_rejects_results_of_wrong_length():
+    ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                          (BatchCounter(drop_last = True), ['tokens'], {0 : 'n_tokens'})])
+    with pytest.raises(ValueError, match = 'returned 1 results for a batch of 2 documents'):
+        ppl.process_batch(['a', 'b c'])
+
+
+def test_stream_preserves_order():
+    def slow_on_short(tokens):
+        time.sleep(0.01 if len(tokens) < 2 else 0.)
+        return len(tokens)
+
+    ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                          (slow_on_short, ['tokens'], {0 : 'n_tokens'})],
+                         outputs = ['n_tokens'])
+    texts = ['a', 'b c', 'd e f', 'g'] * 5
+    assert [e['n_tokens'] for e in ppl.stream(texts, max_in_flight = 3)] == [len(e.split()) for e in texts]
+
+
+def test_stream_bounds_documents_in_flight():
+    consumed = []
+
+    def documents():
+        for i in range(1000):
+            consumed.append(i)
+            yield 'a ' * i
+
+    stream = make_pipeline().stream(documents(), max_in_flight = 2)
+    assert next(stream) == {'n_tokens' : 0}
+    time.sleep(0.2)
+    # the feeder takes one more document from the iterable while it waits for a free slot
+    assert len(consumed) <= 4
+    stream.close()
+
+
+def test_stream_reraises_errors_in_order():
+    def check(tokens):
+        if tokens == ['bad']:
+            raise RuntimeError('bad document')
+
+        return len(tokens)
+
+    ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                          (check, ['tokens'], {0 : 'n_tokens'})],
+                         outputs = ['n_tokens'])
+    stream = ppl.stream(['a', 'b c', 'bad', 'd'])
+    assert next(stream) == {'n_tokens' : 1}
+    assert next(stream) == {'n_tokens' : 2}
+    with pytest.raises(RuntimeError, match = 'bad document'):
+        next(stream)
+
+
+def test_stream_reraises_errors_of_the_iterable():
+    def documents():
+        yield 'a'
+        raise IOError('broken input')
+
+    stream = make_pipeline().stream(documents())
+    assert next(stream) == {'n_tokens' : 1}
+    with pytest.raises(IOError, match = 'broken input'):
+        next(stream)
+
+
+class Blob:
+    pass
+
+
+def test_outputs_filter_annotations():
+    ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                          (count, ['tokens'], {0 : 'n_tokens'}),
+                          (lambda tokens : None, ['tokens'], {0 : 'empty'})],
+                         outputs = ['tokens', 'n_tokens'])
+    assert ppl('a b') == {'tokens' : ['a', 'b'], 'n_tokens' : 2}
+    assert PipelineCommon(ppl.get_processors())('a') == {'text' : 'a', 'tokens' : ['a'], 'n_tokens' : 1}
+
+
+def test_outputs_release_dead_annotations():
+    refs = []
+
+    def make_blob(text):
+        blob = Blob()
+        refs.append(weakref.ref(blob))
+        return blob
+
+    def is_released(text):
+        return refs[-1]() is None
+
+    processors = [(make_blob, ['text'], {0 : 'blob'}),
+                  (lambda blob : 1, ['blob'], {0 : 'one'}),
+                  (is_released, ['text'], {0 : 'released'})]
+    assert PipelineCommon(processors, outputs = ['released'])('a') == {'released' : True}
+    assert PipelineCommon(processors)('a')['released'] is False
+
+
+def test_pickle_round_trip():
+    ppl = pickle.loads(pickle.dumps(make_pipeline()))
+    assert ppl('a b c') == {'n_tokens' : 3}
+    assert ppl.process_batch(['a', 'b c']) == [{'n_tokens' : 1}, {'n_tokens' : 2}]
+
+
+def test_pickle_drops_executor():
+    with ThreadPoolExecutor(max_workers = 2) as executor:
+        ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'}),
+                              (count, ['tokens'], {0 : 'n_tokens'})],
+                             executor = executor)
+        copy = pickle.loads(pickle.dumps(ppl))
+    assert copy('a b c') == {'text' : 'a b c', 'tokens' : ['a', 'b', 'c'], 'n_tokens' : 3}
+
+
+def test_pickle_drops_hooks_and_async_executor():
+    from isanlp.pipeline_profiler import ProfileCollector
+
+    profiler = ProfileCollector()
+    with ThreadPoolExecutor(max_workers = 1) as executor:
+        ppl = PipelineCommon([(tokenize, ['text'], {0 : 'tokens'})], hooks = [profiler], async_executor = executor)
+        copy = pickle.loads(pickle.dumps(ppl))
+    assert copy('a b') == {'text' : 'a b', 'tokens' : ['a', 'b']}
+    assert asyncio.run(copy.acall('a b')) == {'text' : 'a b', 'tokens' : ['a', 'b']}
+    assert ppl('a b') == copy('a b')
+    assert profiler.report()[('main', '0')]['count'] == 1
+
+
+def test_nested_pipeline_in_process_pool():
+    with ProcessPoolExecutor(max_workers = 1) as executor:
+        ppl = PipelineCommon([(make_pipeline(), ['text'], {'n_tokens' : 'n_tokens'})], executor = executor)
+        assert ppl('a b') == {'text' : 'a b', 'n_tokens' : 2}
+
+
+class PathRecorder:
+    def __init__(self):
+        self.stages = []
+
+    def on_stage_start(self, pipeline, stage, input_data):
+        pass
+
+    def on_stage_end(self, pipeline, stage, input_data, results, error):
+        self.stages.append((pipeline, stage))
+
+
+def test_hooks_report_paths_of_nested_pipelines():
+    from isanlp.pipeline_conditional import PipelineConditional
+
+    branches = {'ru' : PipelineCommon([(tokenize, ['text'], {0 : 'tokens'})], name = 'ru'),
+                'en' : PipelineCommon([(tokenize, ['text'], {0 : 'tokens'})], name = 'en')}
+    recorder = PathRecorder()
+    ppl = PipelineCommon([(lambda text : 'en' if text.isascii() else 'ru', ['text'], {0 : 'lang'}),
+                          (PipelineConditional(lambda text, lang : lang, branches), ['text', 'lang'],
+                           {'tokens' : 'tokens'})],
+                         hooks = [recorder])
+    ppl('a b')
+    ppl('а б')
+    assert recorder.stages == [('main', '0'), ('main/1/en', '0'), ('main', '1'),
+                               ('main', '0'), ('main/1/ru', '0'), ('main', '1')]
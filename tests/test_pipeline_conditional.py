@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from isanlp.pipeline_common import PipelineCommon
+from isanlp.pipeline_conditional import PipelineConditional
+
+
+def thread_name(text):
+    return threading.current_thread().name
+
+
+def thread_info(text):
+    return {'thread' : thread_name(text)}
+
+
+def is_ascii(text):
+    return 'en' if text.isascii() else 'ru'
+
+
+def make_conditional():
+    return PipelineConditional(is_ascii, {'en' : thread_info,
+                                          'ru' : PipelineCommon([(thread_name, ['text'], {0 : 'thread'})])})
+
+
+def test_batch_call_groups_documents_by_branch():
+    calls = []
+
+    def upper(texts):
+        calls.append(len(texts))
+        return [text.upper() for text, in texts]
+
+    class Upper:
+        def __call__(self, text):
+            return text.upper()
+
+        def batch_call(self, batch):
+            return upper(batch)
+
+    ppl = PipelineConditional(is_ascii, {'en' : Upper()}, default_ppl = lambda text : text)
+    assert ppl.batch_call(['a', 'б', 'c', 'д']) == ['A', 'б', 'C', 'д']
+    assert calls == [2]
+
+
+def test_acall_uses_executor_of_enclosing_pipeline():
+    with ThreadPoolExecutor(max_workers = 1, thread_name_prefix = 'isanlp-test') as executor:
+        ppl = PipelineCommon([(make_conditional(), ['text'], {'thread' : 'thread'})], async_executor = executor)
+
+        async def run():
+            return await ppl.acall('a'), await ppl.acall('б')
+
+        en, ru = asyncio.run(run())
+
+    assert en['thread'].startswith('isanlp-test')
+    assert ru['thread'].startswith('isanlp-test')
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from isanlp.pipeline_common import PipelineCommon
+from isanlp.pipeline_profiler import ProfileCollector, percentile
+
+
+def fail(text):
+    raise RuntimeError('broken processor')
+
+
+def slow(text):
+    time.sleep(0.1)
+    return text
+
+
+async def afail(text):
+    raise RuntimeError('broken processor')
+
+
+async def aslow(text):
+    await asyncio.sleep(1.)
+    return text
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile(list(range(1, 101)), 90) == 90
+
+
+def test_report_counts_calls_and_errors():
+    profiler = ProfileCollector()
+    ppl = PipelineCommon([(str.split, ['text'], {0 : 'tokens'}),
+                          (lambda tokens : fail('') if not tokens else len(tokens), ['tokens'], {0 : 'n'})],
+                         hooks = [profiler])
+    ppl('a b')
+    with pytest.raises(RuntimeError):
+        ppl('')
+
+    report = profiler.report()
+    assert report[('main', '0')]['count'] == 2
+    assert (report[('main', '1')]['count'], report[('main', '1')]['errors']) == (1, 1)
+
+
+def test_concurrent_failure_releases_started_stages():
+    profiler = ProfileCollector()
+    with ThreadPoolExecutor(max_workers = 2) as executor:
+        ppl = PipelineCommon([(slow, ['text'], {0 : 'slow'}),
+                              (fail, ['text'], {0 : 'failed'})],
+                             executor = executor, hooks = [profiler])
+        with pytest.raises(RuntimeError):
+            ppl('a')
+
+    assert profiler._starts() == {}
+    assert [stats['errors'] for stats in profiler.report().values()] == [1, 1]
+
+
+def test_async_failure_releases_started_stages():
+    profiler = ProfileCollector()
+    ppl = PipelineCommon([(aslow, ['text'], {0 : 'slow'}),
+                          (afail, ['text'], {0 : 'failed'})],
+                         hooks = [profiler])
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await ppl.acall('a')
+
+        await asyncio.sleep(0)
+        return profiler._starts()
+
+    assert asyncio.run(run()) == {}
@@ -0,0 +1,112 @@
+import asyncio
+import time
+import types
+from concurrent import futures
+
+import grpc
+import pytest
+
+from isanlp import annotation_pb2_grpc
+from isanlp.nlp_service import _reply_message
+from isanlp.processor_remote import ProcessorRemote, _Balancer
+
+
+def make_endpoints(n):
+    return [types.SimpleNamespace(name = i, outstanding = 0, failures = 0, ejected_until = 0.) for i in range(n)]
+
+
+def test_round_robin_cycles_through_endpoints():
+    balancer = _Balancer(make_endpoints(3), 'round_robin', max_failures = 3, ejection_time = 30.)
+    selected = [balancer.acquire() for _ in range(6)]
+    assert sorted(e.name for e in selected[:3]) == [0, 1, 2]
+    assert [e.name for e in selected[:3]] == [e.name for e in selected[3:]]
+
+
+def test_least_outstanding_selects_least_loaded_endpoint():
+    endpoints = make_endpoints(3)
+    endpoints[0].outstanding = 2
+    endpoints[2].outstanding = 1
+    balancer = _Balancer(endpoints, 'least_outstanding', max_failures = 3, ejection_time = 30.)
+    assert balancer.acquire().name == 1
+    assert balancer.acquire(exclude = endpoints[1]).name == 2
+
+
+def test_endpoint_is_ejected_after_consecutive_failures():
+    endpoints = make_endpoints(2)
+    balancer = _Balancer(endpoints, 'round_robin', max_failures = 2, ejection_time = 30.)
+    for code in [grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.INVALID_ARGUMENT, grpc.StatusCode.UNAVAILABLE]:
+        endpoints[0].outstanding += 1
+        balancer.release(endpoints[0], code)
+
+    # failures of requests (not of the endpoint) reset the counter
+    assert endpoints[0].ejected_until == 0.
+
+    endpoints[0].outstanding += 1
+    balancer.release(endpoints[0], grpc.StatusCode.DEADLINE_EXCEEDED)
+    assert endpoints[0].ejected_until > time.monotonic()
+    assert {balancer.acquire().name for _ in range(4)} == {1}
+
+    # if all endpoints are ejected, requests are still sent to them
+    endpoints[1].ejected_until = endpoints[0].ejected_until
+    assert {balancer.acquire().name for _ in range(4)} == {0, 1}
+
+
+class DelayServicer(annotation_pb2_grpc.NlpServiceServicer):
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+
+    def process(self, request, context):
+        time.sleep(self.delay)
+        return _reply_message({'server' : self.name})
+
+
+@pytest.fixture
+def start_servicer():
+    servers = []
+
+    def start(servicer):
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers = 4))
+        annotation_pb2_grpc.add_NlpServiceServicer_to_server(servicer, server)
+        port = server.add_insecure_port('localhost:0')
+        server.start()
+        servers.append(server)
+        return 'localhost:{}'.format(port)
+
+    yield start
+    for server in servers:
+        server.stop(0)
+
+
+def test_hedged_requests_use_the_first_reply(start_servicer):
+    endpoints = [start_servicer(DelayServicer('slow', 2.)), start_servicer(DelayServicer('fast', 0.))]
+    remote = ProcessorRemote(None, None, 'main', endpoints = endpoints, hedge_delay = 0.1)
+    for _ in range(2):
+        start = time.time()
+        assert remote('text') == {'server' : 'fast'}
+        assert time.time() - start < 1.
+
+    async def run():
+        try:
+            return [await remote.acall('text') for _ in range(2)]
+        finally:
+            await remote.aclose()
+
+    start = time.time()
+    assert asyncio.run(run()) == [{'server' : 'fast'}] * 2
+    assert time.time() - start < 2.
+
+
+def test_unavailable_endpoint_is_ejected(start_servicer):
+    endpoints = ['localhost:1', start_servicer(DelayServicer('alive', 0.))]
+    remote = ProcessorRemote(None, None, 'main', endpoints = endpoints, max_failures = 1)
+    results = []
+    for _ in range(6):
+        try:
+            results.append(remote('text')['server'])
+        except grpc.RpcError as err:
+            assert err.code() == grpc.StatusCode.UNAVAILABLE
+            results.append(None)
+
+    assert results.count(None) <= 1
+    assert results[-4:] == ['alive'] * 4
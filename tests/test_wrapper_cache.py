@@ -0,0 +1,68 @@
+import asyncio
+
+from isanlp.wrapper_cache import StageCache, WrapperCache, fingerprint
+
+
+class Tagger:
+    def __init__(self, tags):
+        self.tags = tags
+        self.n_calls = 0
+
+    def __call__(self, tokens):
+        self.n_calls += 1
+        return [self.tags[0]] * len(tokens)
+
+    async def acall(self, tokens):
+        self.n_calls += 1
+        return [self.tags[0]] * len(tokens)
+
+
+def test_key_does_not_depend_on_object_identity():
+    cache = StageCache()
+    interned = ['NOUN'] * 3
+    fresh = [''.join(['NO', 'UN']) for _ in range(3)]
+    assert cache.make_key('f', (interned,)) == cache.make_key('f', (fresh,))
+    assert cache.make_key('f', ({'a' : 1, 'b' : 2},)) == cache.make_key('f', ({'b' : 2, 'a' : 1},))
+    assert cache.make_key('f', (True,)) != cache.make_key('f', (b'True',))
+
+
+def test_fingerprint_includes_container_configuration():
+    assert fingerprint(Tagger(['NOUN'])) != fingerprint(Tagger(['VERB']))
+    assert fingerprint(Tagger(['NOUN'])) == fingerprint(Tagger(['NOUN']))
+
+
+def test_fingerprint_ignores_state_of_processor():
+    tagger = Tagger(['NOUN'])
+    before = fingerprint(tagger)
+    tagger(['a'])
+    tagger.model = 'loaded lazily'
+    assert fingerprint(tagger) == before
+
+    cache = StageCache()
+    assert WrapperCache(tagger, cache)(['a', 'b']) == ['NOUN', 'NOUN']
+    assert WrapperCache(tagger, cache)(['a', 'b']) == ['NOUN', 'NOUN']
+    assert tagger.n_calls == 2
+
+
+class KeyedTagger(Tagger):
+    def __init__(self, tags, version):
+        super().__init__(tags)
+        self._model_version = version
+        self.cache_key = 'model-{}'.format(version)
+
+
+def test_fingerprint_uses_explicit_cache_key():
+    assert fingerprint(KeyedTagger(['NOUN'], 1)) == fingerprint(KeyedTagger(['VERB'], 1))
+    assert fingerprint(KeyedTagger(['NOUN'], 1)) != fingerprint(KeyedTagger(['NOUN'], 2))
+    assert fingerprint(KeyedTagger(['NOUN'], 1)).endswith(':model-1')
+
+
+def test_acall_uses_cache():
+    tagger = Tagger(['NOUN'])
+    wrapper = WrapperCache(tagger, StageCache())
+
+    async def run():
+        return [await wrapper.acall(['a', 'b']), await wrapper.acall(['a', 'b'])]
+
+    assert asyncio.run(run()) == [['NOUN', 'NOUN']] * 2
+    assert tagger.n_calls == 1